@@ -1,22 +1,29 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 from langchain.output_parsers import PydanticOutputParser
 from langchain.schema import SystemMessage, HumanMessage, AIMessage
-from langchain.chains import RetrievalQA
-from utils.retriever import vectorstore
 from utils.prompt_loader import load_prompt
 from model.constitution_model import constitution_llm
 import traceback
 from enum import Enum
 from core.config import settings
 from prompt.get_prompt import get_prompt
+from utils.opening_questions import OpeningQuestionPool
+from utils.diagnosis_session import DiagnosisSession, diagnosis_sessions
 
 router = APIRouter()
 
 # --- 요청 및 응답 모델 정의
 class DiagnoseRequest(BaseModel):
+    # session_id 가 없으면 answers 전체로 매번 진단 (기존 방식)
+    # session_id 가 있으면 answer(새 답변 하나)만 보내고, turn 은 이 답변을 포함한 전체 답변 수
+    # session_id 와 answers 만 보내면 해당 세션을 answers 로 새로 시작 (빈 목록이면 새 진단)
     answers: List[Dict[str, str]] = Field(default_factory=list)
+    session_id: Optional[str] = None
+    answer: Optional[Dict[str, str]] = None
+    turn: Optional[int] = None
 
 class DiagnoseResponse(BaseModel):
     constitution: str
@@ -45,83 +52,178 @@ class DiagnosisModel(BaseModel):
 parser = PydanticOutputParser(pydantic_object=DiagnosisModel)
 format_instructions = parser.get_format_instructions()
 
-# --- LLM 및 RAG 설정
+# --- LLM 설정
 llm = constitution_llm
 
-retriever = vectorstore.as_retriever()
 
-
-async def generate_question(answers: List[Dict[str, str]]) -> str:
-    # 시스템 프롬프트 로드
+def format_history(answers: List[Dict[str, str]], summary: str = "") -> str:
     history_text = "\n".join([f"Q: {qa['question']}\nA: {qa['answer']}" for qa in answers])
-    prompt = get_prompt(settings.CONSTITUTION_DIAGNOSE_ANSWER_PROMPT_NAME)
-    formatted_system = prompt.format(qa_list=history_text)
-    print("QAHISTORY:", history_text)
+    if summary:
+        return f"[이전 문진 요약]\n{summary}\n\n[최근 Q&A]\n{history_text}"
+    return history_text
+
+def history_messages(formatted_system: str, answers: List[Dict[str, str]]) -> list:
     # 대화 메시지 구성: system + (AIMessage(question), HumanMessage(answer))*
     messages = [SystemMessage(content=formatted_system)]
     for qa in answers:
         messages.append(AIMessage(content=qa['question']))
         messages.append(HumanMessage(content=qa['answer']))
+    return messages
+
+async def generate_question(answers: List[Dict[str, str]], summary: str = "") -> str:
+    # 시스템 프롬프트 로드
+    history_text = format_history(answers, summary)
+    prompt = get_prompt(settings.CONSTITUTION_DIAGNOSE_ANSWER_PROMPT_NAME)
+    formatted_system = prompt.format(qa_list=history_text)
+    print("QAHISTORY:", history_text)
     # LLM에 메시지 전달하여 질문 생성
-    resp = await llm.agenerate([messages])
+    resp = await llm.agenerate([history_messages(formatted_system, answers)])
     question = resp.generations[0][0].text.strip()
     print("Generated question:", question)
     return question
 
-async def perform_diagnose(answers: List[Dict[str, str]]) -> DiagnosisModel:
+async def perform_diagnose(answers: List[Dict[str, str]], summary: str = "") -> DiagnosisModel:
     # 프롬프트 로드 및 포맷
     prompt = get_prompt(settings.CONSTITUTION_DIAGNOSE_PROMPT_NAME)
-    history_text = "\n".join([f"Q: {qa['question']}\nA: {qa['answer']}" for qa in answers])
+    history_text = format_history(answers, summary)
     # format_instructions를 포함하여 시스템 메시지 구성
     formatted_system = prompt.format(qa_list=history_text, format_instructions=format_instructions)
     print("DIAGNOSIS HISTORY:", history_text)
-    # 메시지 리스트 구성: System → (AIMessage, HumanMessage)*
-    messages = [SystemMessage(content=formatted_system)]
-    for qa in answers:
-        messages.append(AIMessage(content=qa['question']))
-        messages.append(HumanMessage(content=qa['answer']))
     # LLM 호출
-    resp = await llm.agenerate([messages])
+    resp = await llm.agenerate([history_messages(formatted_system, answers)])
     content = resp.generations[0][0].text.strip()
     print("Diagnosis LLM output:", content)
     # 결과 파싱
     parsed: DiagnosisModel = parser.parse(content)
     return parsed
 
+async def summarize_history(summary: str, answers: List[Dict[str, str]]) -> str:
+    """기존 요약에 오래된 Q/A 를 합쳐 새 요약을 만듭니다."""
+    prompt = get_prompt(settings.CONSTITUTION_DIAGNOSE_SUMMARY_PROMPT_NAME)
+    formatted = prompt.format(summary=summary or "(없음)", qa_list=format_history(answers))
+    resp = await llm.agenerate([[HumanMessage(content=formatted)]])
+    return resp.generations[0][0].text.strip()
+
+# 첫 질문(빈 대화 기록) 풀: main.py lifespan 에서 주기적 갱신 시작/종료
+opening_questions = OpeningQuestionPool(
+    lambda: generate_question([]),
+    size=settings.DIAGNOSE_OPENING_POOL_SIZE,
+    refresh_seconds=settings.DIAGNOSE_OPENING_REFRESH_SECONDS,
+)
+
+async def opening_question() -> str:
+    return opening_questions.take() or await generate_question([])
+
+async def diagnose_with_question(answers: List[Dict[str, str]], summary: str = ""):
+    """
+    진단과 다음 질문 생성을 동시에 실행합니다. (진단 결과, 다음 질문)을 반환하며,
+    신뢰도가 충분하면 질문 생성은 취소하고 질문은 None 입니다.
+    """
+    question_task = asyncio.create_task(generate_question(answers, summary))
+    try:
+        diag_result = await perform_diagnose(answers, summary)
+        if diag_result.confidence < 0.85:
+            return diag_result, await question_task
+        return diag_result, None
+    finally:
+        if not question_task.done():
+            question_task.cancel()
+
+async def diagnose_turn(answers: List[Dict[str, str]], count: int, summary: str = "") -> DiagnoseResponse:
+    """
+    count: 지금까지 받은 전체 답변 수, answers/summary: LLM 에 보낼 최근 Q/A 와 이전 문진 요약
+    """
+    # 1) 초기 질문
+    if count == 0:
+        question = await opening_question()
+        return DiagnoseResponse(
+            constitution="", reason="", confidence=0.0, can_diagnose=False, next_question=question
+        )
+    # 2) 추가 질문 (최소 8개 질문)
+    if count < 8:
+        question = await generate_question(answers, summary)
+        return DiagnoseResponse(
+            constitution="", reason="", confidence=0.0, can_diagnose=False, next_question=question
+        )
+    # 3) 진단 수행 (10문항 전까지는 추가 질문 생성을 동시에 시작)
+    if count < 10:
+        diag_result, question = await diagnose_with_question(answers, summary)
+    else:
+        diag_result, question = await perform_diagnose(answers, summary), None
+    # 4) 신뢰도 판단 및 추가 질문
+    if question is not None:
+        return DiagnoseResponse(
+            constitution="", reason="", confidence=0.0, can_diagnose=False, next_question=question
+        )
+    # 5) 최종 결과
+    return DiagnoseResponse(
+        constitution=diag_result.constitution,
+        reason=diag_result.reason,
+        confidence=diag_result.confidence,
+        can_diagnose=True,
+        next_question=None
+    )
+
+# --- 진단 세션 (Backend 가 새 답변만 보내는 방식)
+def needs_compaction(session: DiagnosisSession) -> bool:
+    """최근 Q/A 가 DIAGNOSE_SESSION_RECENT_TURNS 의 두 배를 넘을 때만 요약 (매 턴 요약 LLM 호출을 피함)"""
+    return len(session.recent) > 2 * settings.DIAGNOSE_SESSION_RECENT_TURNS
+
+async def compact_session(session: DiagnosisSession):
+    """요약 시점이 되면 오래된 Q/A 를 요약에 합치고 최근 DIAGNOSE_SESSION_RECENT_TURNS 개만 남겨 프롬프트 크기를 일정하게 유지"""
+    if not needs_compaction(session):
+        return
+    overflow = len(session.recent) - settings.DIAGNOSE_SESSION_RECENT_TURNS
+    session.summary = await summarize_history(session.summary, session.recent[:overflow])
+    session.recent = session.recent[overflow:]
+
+async def _compact_in_background(session_id: str):
+    # 응답을 보낸 뒤 요약을 갱신. 다음 요청은 세션 잠금에서 요약이 끝나기를 기다림
+    try:
+        async with diagnosis_sessions.lock(session_id):
+            session = await diagnosis_sessions.get(session_id)
+            if session is not None and needs_compaction(session):
+                await compact_session(session)
+                await diagnosis_sessions.save(session)
+    except Exception as e:
+        print(f"진단 세션 요약 실패: session_id={session_id}, error={e}")
+
+_compaction_tasks: set = set()
+
+async def diagnose_session(request: DiagnoseRequest) -> DiagnoseResponse:
+    session_id = request.session_id
+    async with diagnosis_sessions.lock(session_id):
+        if request.answer is None:
+            # 새 세션 시작 또는 전체 답변으로 세션 복구
+            session = DiagnosisSession(session_id=session_id, recent=list(request.answers), count=len(request.answers))
+            await compact_session(session)
+        else:
+            session = await diagnosis_sessions.get(session_id)
+            if session is None or (request.turn is not None and session.count != request.turn - 1):
+                # 세션이 없거나(만료/다른 워커) 답변 수가 맞지 않으면 호출자가 전체 answers 로 다시 보냄
+                raise HTTPException(status_code=409, detail="diagnosis session not found or out of sync")
+            session = session.copy(deep=True)
+            session.recent.append(request.answer)
+            session.count += 1
+        response = await diagnose_turn(session.recent, session.count, session.summary)
+        await diagnosis_sessions.save(session)
+    if needs_compaction(session):
+        task = asyncio.create_task(_compact_in_background(session_id))
+        _compaction_tasks.add(task)
+        task.add_done_callback(_compaction_tasks.discard)
+    return response
+
 # --- FastAPI 라우터
 @router.post("/", response_model=DiagnoseResponse)
 async def diagnose(request: DiagnoseRequest):
     try:
         print("request:", request)
+        if request.session_id:
+            return await diagnose_session(request)
         answers = request.answers or []
-        # 1) 초기 질문
-        if not answers:
-            question = await generate_question(answers)
-            return DiagnoseResponse(
-                constitution="", reason="", confidence=0.0, can_diagnose=False, next_question=question
-            )
-        # 2) 추가 질문 (최소 8개 질문)
-        if len(answers) < 8:
-            question = await generate_question(answers)
-            return DiagnoseResponse(
-                constitution="", reason="", confidence=0.0, can_diagnose=False, next_question=question
-            )
-        # 3) 진단 수행
-        diag_result = await perform_diagnose(answers)
-        # 4) 신뢰도 판단 및 추가 질문
-        if len(answers) < 10 and diag_result.confidence < 0.85:
-            question = await generate_question(answers)
-            return DiagnoseResponse(
-                constitution="", reason="", confidence=0.0, can_diagnose=False, next_question=question
-            )
-        # 5) 최종 결과
-        return DiagnoseResponse(
-            constitution=diag_result.constitution,
-            reason=diag_result.reason,
-            confidence=diag_result.confidence,
-            can_diagnose=True,
-            next_question=None
-        )
+        return await diagnose_turn(answers, len(answers))
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"diagnose internal error: {str(e)}")
@@ -1,9 +1,12 @@
 from fastapi import FastAPI, HTTPException, APIRouter
+from fastapi.responses import StreamingResponse
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 import openai
 import json
+import time
+import asyncio
 import traceback
 from datetime import datetime
 import core.config as config
@@ -12,7 +15,12 @@ from utils.prompt_loader import load_prompt
 from langsmith import traceable
 from model.recipe_model import recipe_llm
 from prompt.get_prompt import get_prompt
-from utils.evaluator.recipe_evaluator import evaluate_qa, evaluate_recipe
+from utils.evaluator.recipe_evaluator import aevaluate_qa, aevaluate_recipe
+from utils.evaluator.evaluation_worker import submit_evaluation, get_session_evaluations
+from utils.response_cache import recipe_response_cache
+from utils.slot_router import user_profile
+from utils.concurrency import provider_semaphore
+from utils.metering import calculate_tokens_and_cost, request_meter
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from model.get_llm import get_llm
 from model.recipe_model import get_recipe_llm
@@ -49,6 +57,9 @@ class ChatResponse(BaseModel):
     recipe_result: Optional[List[Dict[str, str]]] = None
     qa_score: Optional[float] = None
     recipe_score: Optional[float] = None
+    usage: Optional[Dict[str, Any]] = None  # 요청 단위 토큰/비용/소요 시간 (노드별, 모델별)
+    cached: bool = False                    # 시맨틱 캐시 적중 응답 여부
+    cache_id: Optional[str] = None          # 캐시 항목 id (Backend 가 같은 레시피를 다시 저장하지 않도록 사용)
 # ChatOpenAI에 openai_api_key 파라미터로 전달하여 OpenAI 클라이언트에 API 키 설정
 llm = recipe_llm
 
@@ -127,7 +138,31 @@ def request_to_input(request: ChatRequest):
     return composite_messages
 
 
-def output_to_json_response(request: ChatRequest,content: str):
+def graph_input(request: ChatRequest, history_message: list) -> Dict[str, Any]:
+    return {"query": history_message, "constitution": request.constitution, "profile": user_profile(request)}
+
+
+def base_prompt_messages(history_message: list):
+    # 그래프를 사용하지 않는 경우: 기본 프롬프트 + 형식 지침 + 대화 내역
+    prompt_template = get_prompt(settings.CONSTITUTION_RECIPE_BASE_PROMPT_NAME)
+    format_instructions = parser.get_format_instructions()
+    formatted = prompt_template.format(format_instructions=format_instructions)
+    composite_messages = [SystemMessage(content=formatted), SystemMessage(content=f"응답 형식 지침:\n{format_instructions}")]
+    composite_messages.extend(history_message)
+    return composite_messages
+
+
+def graph_output_content(state: Dict[str, Any]) -> str:
+    """그래프 최종 상태에서 응답 본문을 꺼냅니다. 레시피 경로는 answer, 질문 경로는 query 를 사용합니다."""
+    answer = state.get("answer")
+    if state.get("route") == "recipe_gen" and answer:
+        if hasattr(answer, "json"):
+            return answer.json(ensure_ascii=False)
+        return answer if isinstance(answer, str) else json.dumps(answer, ensure_ascii=False)
+    return state.get("query", "")
+
+
+async def output_to_json_response(request: ChatRequest,content: str):
     # 레시피 감지 플래그
     recipe_detected = False
     try:
@@ -160,32 +195,65 @@ def output_to_json_response(request: ChatRequest,content: str):
             recipes_list = []
             response_message = content
     
-    # 레시피 평가
+    # 레시피 평가는 백그라운드 워커에서 수행하고 응답은 바로 반환
     if recipe_detected:
-        qa_result, qa_score = evaluate_qa(request.messages)
-        recipe_result, recipe_score = evaluate_recipe(request.messages, response_message)
-        return ChatResponse(message=response_message, is_recipe=recipe_detected, qa_result=qa_result, recipe_result=recipe_result, qa_score=qa_score, recipe_score=recipe_score)
+        submit_evaluation(request.session_id, request.messages, response_message, request.constitution)
     return ChatResponse(message=response_message, is_recipe=recipe_detected)
 
 
+async def lookup_cached_response(request: ChatRequest):
+    """시맨틱 캐시 조회. 캐시 오류는 채팅을 막지 않도록 미스로 처리합니다."""
+    if not settings.RECIPE_CACHE_ENABLED:
+        return None, None
+    try:
+        cached, cache_key = await recipe_response_cache.alookup(request)
+    except Exception as e:
+        print(f"[{datetime.now()}] 레시피 캐시 조회 실패: {e}")
+        return None, None
+    if cached is not None:
+        print(f"[{datetime.now()}] 레시피 캐시 적중: session_id={request.session_id}")
+    return cached, cache_key
+
+
+async def store_cached_response(cache_key, response: ChatResponse) -> Optional[str]:
+    """레시피 응답을 시맨틱 캐시에 저장하고 cache_id 를 반환합니다. 저장 실패는 응답에 영향을 주지 않습니다."""
+    if not settings.RECIPE_CACHE_ENABLED:
+        return None
+    try:
+        return await recipe_response_cache.astore(cache_key, response.dict())
+    except Exception as e:
+        print(f"[{datetime.now()}] 레시피 캐시 저장 실패: {e}")
+        return None
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     print(f"[{datetime.now()}] 체질 레시피 요청 시작: session_id={request.session_id}, feature={request.feature}")
+    # 라우터/요약/관련성/생성/평가 등 이 요청에서 발생한 모든 LLM 호출 사용량을 응답에 포함
+    with request_meter() as meter:
+        response = await generate_chat_response(request)
+    response.usage = meter.summary()
+    print(f"[{datetime.now()}] 체질 레시피 요청 사용량: session_id={request.session_id}, tokens={response.usage['input_tokens']}/{response.usage['output_tokens']}, cost={response.usage['cost']:.6f}")
+    return response
+
+
+async def generate_chat_response(request: ChatRequest) -> ChatResponse:
     try:
+        cached, cache_key = await lookup_cached_response(request)
+        if cached is not None:
+            return ChatResponse(**{**cached, "cached": True})
         history_message = request_to_input(request)
         if "graph" in settings.RECIPE_LLM_NAME:
-            resp = get_recipe_llm(settings.RECIPE_LLM_NAME).invoke({"query": history_message})
-            content = resp['query']
+            resp = await get_recipe_llm(settings.RECIPE_LLM_NAME).ainvoke(graph_input(request, history_message))
+            content = graph_output_content(resp)
         else:
-            prompt_template = get_prompt(settings.CONSTITUTION_RECIPE_BASE_PROMPT_NAME)
-            format_instructions = parser.get_format_instructions()
-            formatted = prompt_template.format(format_instructions=format_instructions)
-            composite_messages = [SystemMessage(content=formatted), SystemMessage(content=f"응답 형식 지침:\n{format_instructions}")]
-            composite_messages.extend(history_message)
-            resp = get_recipe_llm(settings.RECIPE_LLM_NAME).invoke(composite_messages)
+            composite_messages = base_prompt_messages(history_message)
+            resp = await get_recipe_llm(settings.RECIPE_LLM_NAME).ainvoke(composite_messages)
             content = resp.content
 
-        chat_json_response = output_to_json_response(request,content)
+        chat_json_response = await output_to_json_response(request,content)
+        if chat_json_response.is_recipe:
+            chat_json_response.cache_id = await store_cached_response(cache_key, chat_json_response)
         return chat_json_response
         
     # Exception 처리
@@ -228,9 +296,96 @@ async def chat(request: ChatRequest):
             error=error_msg
         )
 
+@router.get("/evaluations/{session_id}", summary="세션별 레시피 평가 결과 조회")
+async def list_session_evaluations(session_id: str):
+    """백그라운드 워커가 저장한 세션의 레시피 평가 결과를 반환합니다."""
+    try:
+        return await get_session_evaluations(session_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# 토큰을 클라이언트로 내보내는 그래프 노드 (사용자에게 보이는 응답을 만드는 노드만)
+STREAMED_NODES = {"generate", "ask_llm"}
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_chat_events(request: ChatRequest):
+    """그래프 노드 진행 상황과 생성 토큰을 SSE 이벤트로 내보내고, 마지막에 ChatResponse를 done 이벤트로 보냅니다."""
+    with request_meter() as meter:
+        async for event in _stream_chat_events(request, meter):
+            yield event
+
+
+async def _stream_chat_events(request: ChatRequest, meter):
+    try:
+        cached, cache_key = await lookup_cached_response(request)
+        if cached is not None:
+            yield _sse("done", {**cached, "cached": True, "usage": meter.summary()})
+            return
+        history_message = request_to_input(request)
+        if "graph" in settings.RECIPE_LLM_NAME:
+            graph = get_recipe_llm(settings.RECIPE_LLM_NAME)
+            final_state: Dict[str, Any] = {}
+            # 이미 끝난 generate 가 있는 상태에서 새 generate 토큰이 오면 재생성이므로 클라이언트에 reset 을 보냄
+            generate_finished = False
+            async for mode, chunk in graph.astream(graph_input(request, history_message), stream_mode=["updates", "messages"]):
+                if mode == "updates":
+                    for node, update in chunk.items():
+                        yield _sse("node", {"node": node})
+                        if node == "generate":
+                            generate_finished = True
+                        if update:
+                            final_state.update(update)
+                else:
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    # 라우터/요약/관련성/평가 LLM 출력은 사용자 응답이 아니므로 토큰으로 내보내지 않음
+                    if node not in STREAMED_NODES or not isinstance(message.content, str) or not message.content:
+                        continue
+                    if node == "generate" and generate_finished:
+                        generate_finished = False
+                        yield _sse("reset", {"node": node})
+                    yield _sse("token", {"node": node, "content": message.content})
+            content = graph_output_content(final_state)
+        else:
+            composite_messages = base_prompt_messages(history_message)
+            parts: List[str] = []
+            async for message in get_recipe_llm(settings.RECIPE_LLM_NAME).astream(composite_messages):
+                if isinstance(message.content, str) and message.content:
+                    parts.append(message.content)
+                    yield _sse("token", {"content": message.content})
+            content = "".join(parts)
+
+        chat_json_response = await output_to_json_response(request, content)
+        if chat_json_response.is_recipe:
+            chat_json_response.cache_id = await store_cached_response(cache_key, chat_json_response)
+        chat_json_response.usage = meter.summary()
+        yield _sse("done", chat_json_response.dict())
+    except Exception as e:
+        print('constitution_recipe.py 스트리밍 예외 발생:', str(e))
+        print(traceback.format_exc())
+        yield _sse("error", {
+            "message": "레시피를 생성하는 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.",
+            "error": f"알 수 없는 오류: {str(e)}",
+        })
+
+
+@router.post("/stream", summary="체질 레시피 스트리밍 채팅", description="그래프 진행 상황과 생성 토큰을 Server-Sent Events로 전송합니다.")
+async def chat_stream(request: ChatRequest):
+    print(f"[{datetime.now()}] 체질 레시피 스트리밍 요청 시작: session_id={request.session_id}, feature={request.feature}")
+    return StreamingResponse(
+        stream_chat_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 class TestConversation(BaseModel):
     # Conversation identifiers: either 'id' or 'sid'
     id: Optional[str] = None
+    sid: Optional[str] = None
     messages: List[Dict[str, str]]
 
 class TestRequest(BaseModel):
@@ -251,6 +406,7 @@ class TestItem(BaseModel):
     input_tokens: Optional[int] = None  # 입력 토큰 수
     output_tokens: Optional[int] = None  # 출력 토큰 수
     cost: Optional[float] = None  # 비용 (USD)
+    latency_ms: Optional[int] = None  # 대화 처리 소요 시간 (ms)
 
 class TestResponse(BaseModel):
     results: List[TestItem]
@@ -258,115 +414,78 @@ class TestResponse(BaseModel):
     total_output_tokens: Optional[int] = None
     total_cost: Optional[float] = None
     avg_cost_per_message: Optional[float] = None  # 메시지당 평균 비용 추가
+    usage: Optional[Dict[str, Any]] = None  # 평가 호출까지 포함한 전체 LLM 사용량 (노드별, 모델별)
 
-# 모델별 가격 정보 (1M 토큰당 USD)
-MODEL_PRICING = {
-    # OpenAI 모델
-    "gpt-4.1-2025-04-14": {"input": 2.00, "output": 8.00},
-    "gpt-4.1-nano-2025-04-14": {"input": 0.10, "output": 0.40},
-    "gpt-4o-mini-2024-07-18": {"input": 0.40, "output": 1.60},
-    "gpt-4o": {"input": 5.00, "output": 15.00},
-    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
-    
-    # Gemini 모델
-    "gemini-2.5-flash-preview-04-17": {"input": 0.15, "output": 0.60},
-    "gemini-2.5-pro-preview-03-25": {"input": 1.25, "output": 10.00},
-    "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
-    "gemini-pro": {"input": 0.25, "output": 0.75},
-    
-    # Anthropic 모델
-    "claude-3-7-sonnet-20250219": {"input": 3.00, "output": 15.00},
-    "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.00},
-    "claude-2": {"input": 8.00, "output": 24.00}
-}
-
-# 토큰 사용량 및 비용 계산 함수
-def calculate_tokens_and_cost(provider: str, model: str, response):
-    tokens = {"input": 0, "output": 0}
-    
-    # 프로바이더 및 모델별 토큰 정보 추출
+async def run_test_conversation(conv: TestConversation, req: TestRequest) -> TestItem:
+    """대화 하나에 대해 QA 평가와 (레시피 생성 → 레시피 평가)를 동시에 수행합니다."""
+    started = time.perf_counter()
+    history = conv.messages
+    # 동적 LLM 인스턴스 생성
+    llm_instance = get_llm(req.provider, req.model)
+    # 시스템 프롬프트 + 대화 메시지 구성
+    composite: List[Any] = [SystemMessage(content=req.prompt_str)]
+    for msg in history:
+        if msg.get("role") == "user":
+            composite.append(HumanMessage(content=msg["content"]))
+        else:
+            composite.append(AIMessage(content=msg["content"]))
+
+    async def run_qa():
+        # QA 평가 (평가 LLM은 OpenAI)
+        async with provider_semaphore("openai"):
+            return await aevaluate_qa(history)
+
+    async def run_generation():
+        # 레시피 생성
+        async with provider_semaphore(req.provider):
+            resp = await llm_instance.ainvoke(composite)
+        # 레시피 평가
+        async with provider_semaphore("openai"):
+            recipe_result, recipe_score = await aevaluate_recipe(history, resp.content)
+        return resp, recipe_result, recipe_score
+
+    (qa_result, qa_score), (resp, recipe_result, recipe_score) = await asyncio.gather(run_qa(), run_generation())
+
+    # 토큰 사용량 및 비용 계산
+    input_tokens, output_tokens, cost = calculate_tokens_and_cost(req.provider, req.model, resp)
+    # 평균 점수: recipe_score만 사용
+    average_score = recipe_score
+    conv_id = conv.id or conv.sid or ""
+    # PydanticOutputParser를 활용해 Recipe 객체 파싱
     try:
-        if provider == "openai":
-            tokens["input"] = response.response_metadata["token_usage"]["prompt_tokens"]
-            tokens["output"] = response.response_metadata["token_usage"]["completion_tokens"]
-        elif provider == "gemini":
-            tokens["input"] = response.usage_metadata["input_tokens"]
-            tokens["output"] = response.usage_metadata["output_tokens"]
-        elif provider == "claude":
-            tokens["input"] = response.response_metadata["usage"]["input_tokens"]
-            tokens["output"] = response.response_metadata["usage"]["output_tokens"]
-    except Exception as e:
-        print(f"토큰 정보 추출 오류: {e}")
-        return 0, 0, 0.0
-    
-    # 비용 계산
-    cost = 0.0
-    if model in MODEL_PRICING:
-        pricing = MODEL_PRICING[model]
-        # 1M 토큰당 가격을 실제 토큰 수에 맞게 변환
-        cost = (tokens["input"] * pricing["input"] / 1000000) + (tokens["output"] * pricing["output"] / 1000000)
-    else:
-        print(f"가격 정보가 없는 모델: {model}")
-    
-    return tokens["input"], tokens["output"], cost
+        recipe_obj = parser.parse(resp.content)
+        recipe_json = recipe_obj.dict()
+    except Exception as parse_err:
+        print('test_constitution_recipe parser error:', parse_err)
+        recipe_json = {}
+    return TestItem(
+        id=conv_id,
+        qa_result=qa_result,
+        qa_score=qa_score,
+        recipe_result=recipe_result,
+        recipe_score=recipe_score,
+        average_score=average_score,
+        recipe_json=recipe_json,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost=cost,
+        latency_ms=int((time.perf_counter() - started) * 1000)
+    )
 
 @router.post("/test", response_model=TestResponse, summary="모델 및 프롬프트 테스트 (다중 대화 처리)")
 async def test_constitution_recipe(req: TestRequest):
     print(f"[{datetime.now()}] 체질 레시피 테스트 요청 시작: message_list={req}")
     try:
-        results: List[TestItem] = []
-        total_input_tokens = 0
-        total_output_tokens = 0
-        total_cost = 0.0
         message_count = len(req.message_list)
-        
-        for conv in req.message_list:
-            history = conv.messages
-            # QA 평가
-            qa_result, qa_score = evaluate_qa(history)
-            # 동적 LLM 인스턴스 생성
-            llm_instance = get_llm(req.provider, req.model)
-            # 시스템 프롬프트 + 대화 메시지 구성
-            composite: List[Any] = [SystemMessage(content=req.prompt_str)]
-            for msg in history:
-                if msg.get("role") == "user":
-                    composite.append(HumanMessage(content=msg["content"]))
-                else:
-                    composite.append(AIMessage(content=msg["content"]))
-            # 레시피 생성
-            resp = llm_instance.invoke(composite)
-            
-            # 토큰 사용량 및 비용 계산
-            input_tokens, output_tokens, cost = calculate_tokens_and_cost(req.provider, req.model, resp)
-            total_input_tokens += input_tokens
-            total_output_tokens += output_tokens
-            total_cost += cost
-            
-            # 레시피 평가
-            recipe_result, recipe_score = evaluate_recipe(history, resp.content)
-            # 평균 점수: recipe_score만 사용
-            average_score = recipe_score
-            conv_id = conv.id or conv.sid or ""
-            # PydanticOutputParser를 활용해 Recipe 객체 파싱
-            try:
-                recipe_obj = parser.parse(resp.content)
-                recipe_json = recipe_obj.dict()
-            except Exception as parse_err:
-                print('test_constitution_recipe parser error:', parse_err)
-                recipe_json = {}
-            results.append(TestItem(
-                id=conv_id,
-                qa_result=qa_result,
-                qa_score=qa_score,
-                recipe_result=recipe_result,
-                recipe_score=recipe_score,
-                average_score=average_score,
-                recipe_json=recipe_json,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                cost=cost
-            ))
-            print("results", results)
+        # 대화들을 동시에 실행 (LLM 호출 수는 provider별 세마포어로 제한), 결과 순서는 요청 순서 유지
+        with request_meter() as meter:
+            results: List[TestItem] = await asyncio.gather(
+                *[run_test_conversation(conv, req) for conv in req.message_list]
+            )
+        print("results", results)
+        total_input_tokens = sum(item.input_tokens for item in results)
+        total_output_tokens = sum(item.output_tokens for item in results)
+        total_cost = sum(item.cost for item in results)
         
         # 메시지 수가 0이면 오류 방지를 위해 1로 설정
         avg_cost_per_message = total_cost / max(message_count, 1)
@@ -376,7 +495,8 @@ async def test_constitution_recipe(req: TestRequest):
             total_input_tokens=total_input_tokens,
             total_output_tokens=total_output_tokens,
             total_cost=total_cost,
-            avg_cost_per_message=avg_cost_per_message  # 메시지당 평균 비용 추가
+            avg_cost_per_message=avg_cost_per_message,  # 메시지당 평균 비용 추가
+            usage=meter.summary()
         )
     except Exception as e:
         import traceback
@@ -390,8 +510,7 @@ class AutoGenerateRecipeRequest(BaseModel):
     difficulty: Optional[str] = Field(None, description="난이도 (쉬움, 중간, 어려움)")
     keyIngredients: Optional[List[str]] = Field(None, description="중요 재료 목록 (육류, 해산물, 채소, 과일, 유제품, 견과류)")
 
-@router.post("/auto_generate", response_model=List[Recipe], summary="자동 레시피 생성", description="체질 및 선택 항목 기반 자동 레시피 생성")
-async def auto_generate_recipe(req: AutoGenerateRecipeRequest):
+async def generate_auto_recipe(req: AutoGenerateRecipeRequest) -> dict:
     """체질·선택항목 기반으로 최대 3회 레시피를 생성·검증하여 반환합니다."""
     max_retries = 3
     for attempt in range(max_retries):
@@ -409,18 +528,16 @@ async def auto_generate_recipe(req: AutoGenerateRecipeRequest):
             ingredients=", ".join(keyIngredients),
             format_instructions=format_instructions
         )
-        from langchain_core.messages import SystemMessage
         messages = [SystemMessage(content=formatted),SystemMessage(content=f"응답 형식 지침:\n{format_instructions}")]
         # LLM 호출
         llm_client = get_recipe_llm(settings.RECIPE_LLM_NAME)
-        print("llm_client : ", llm_client)
-        resp = llm_client.invoke(messages)
+        resp = await llm_client.ainvoke(messages)
         print("resp : ", resp)
         # AIMessage 또는 dict 형태의 응답에서 content를 추출
         if hasattr(resp, "content"):
             content = resp.content
         elif isinstance(resp, dict) and "query" in resp:
-            content = resp["query"]
+            content = graph_output_content(resp)
         else:
             raise HTTPException(status_code=500, detail="LLM 응답에서 content를 찾을 수 없습니다.")
         # 파싱 시도
@@ -434,9 +551,51 @@ async def auto_generate_recipe(req: AutoGenerateRecipeRequest):
         # 레시피 검증 (score >= 0.8)
         # eval_result, eval_score = evaluate_recipe([], content)
         # if eval_score >= 0.8:
-        return [recipe_obj.dict()]
+        return recipe_obj.dict()
         # 기준 미달 시 재생성
     # 재시도 후에도 기준 미달
     raise HTTPException(status_code=500, detail="레시피 검증 실패: 기준을 만족하는 레시피를 생성하지 못했습니다.")
+
+@router.post("/auto_generate", response_model=List[Recipe], summary="자동 레시피 생성", description="체질 및 선택 항목 기반 자동 레시피 생성")
+async def auto_generate_recipe(req: AutoGenerateRecipeRequest):
+    return [await generate_auto_recipe(req)]
+
+class AutoGenerateBatchRequest(BaseModel):
+    specs: List[AutoGenerateRecipeRequest] = Field(..., description="생성할 레시피 조건 목록")
+    concurrency: Optional[int] = Field(None, description="동시 생성 수 (기본값 AUTO_GENERATE_CONCURRENCY)")
+
+async def stream_auto_generated(req: AutoGenerateBatchRequest):
+    """
+    조건별 레시피를 제한된 동시성으로 생성하고, 완료되는 순서대로 한 줄씩 NDJSON 으로 내보냅니다.
+    각 줄은 {"index": 조건 번호, "recipe": {...}} 또는 실패 시 {"index": 조건 번호, "error": "..."} 입니다.
+    """
+    concurrency = min(req.concurrency or settings.AUTO_GENERATE_CONCURRENCY, settings.AUTO_GENERATE_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def generate(index: int, spec: AutoGenerateRecipeRequest):
+        async with semaphore:
+            try:
+                return {"index": index, "recipe": await generate_auto_recipe(spec)}
+            except HTTPException as e:
+                return {"index": index, "error": e.detail}
+            except Exception as e:
+                traceback.print_exc()
+                return {"index": index, "error": str(e)}
+
+    tasks = [asyncio.create_task(generate(index, spec)) for index, spec in enumerate(req.specs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+    finally:
+        # 클라이언트 연결이 끊기면 남은 생성 작업을 취소
+        for task in tasks:
+            task.cancel()
+
+@router.post("/auto_generate/batch", summary="자동 레시피 일괄 생성", description="조건 목록을 동시에 생성하고 완료되는 순서대로 NDJSON 으로 스트리밍합니다.")
+async def auto_generate_recipe_batch(req: AutoGenerateBatchRequest):
+    if len(req.specs) > settings.AUTO_GENERATE_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {settings.AUTO_GENERATE_MAX_BATCH}개까지 생성할 수 있습니다.")
+    print(f"[{datetime.now()}] 자동 레시피 일괄 생성 요청: {len(req.specs)}개")
+    return StreamingResponse(stream_auto_generated(req), media_type="application/x-ndjson")
     
     
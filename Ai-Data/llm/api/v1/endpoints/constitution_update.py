@@ -1,17 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from pymongo import MongoClient
 from bson import ObjectId
 from datetime import datetime
-import core.config as config
+from db.mongo import get_collection
 
 router = APIRouter()
 
-# MongoDB 연결
-mongo_client = MongoClient(config.settings.MONGODB_URI)
-db = mongo_client[config.settings.MONGODB_DB_NAME]
-users_col = db['users']
-
 # 요청/응답 모델
 class UpdateRequest(BaseModel):
     constitution: str
@@ -32,9 +26,11 @@ async def update_constitution(user_id: str, req: UpdateRequest):
             "confidence": req.confidence,
             "diagnosis_date": datetime.utcnow(),
         }
-        result = users_col.update_one({"_id": oid}, {"$set": update_fields})
+        result = await get_collection("users").update_one({"_id": oid}, {"$set": update_fields})
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="User not found")
         return UpdateResponse(user_id=user_id, updated=result.modified_count > 0)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
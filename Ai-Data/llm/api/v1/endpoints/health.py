@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from model.recipe_model import is_recipe_llm_ready
+
+router = APIRouter()
+
+@router.get("/ready", summary="서비스 준비 상태 확인", description="LLM 클라이언트/그래프 warm-up이 끝난 뒤에만 ready를 반환합니다.")
+async def readiness():
+    if not is_recipe_llm_ready():
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True}
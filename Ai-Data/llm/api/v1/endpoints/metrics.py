@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from utils.metering import process_meter
+from utils.retriever import recipe_embedding
+from utils.web_search import recipe_web_search
+from utils.response_cache import recipe_response_cache
+from api.v1.endpoints.constitution_diagnose import opening_questions
+from utils.diagnosis_session import diagnosis_sessions
+
+router = APIRouter()
+
+@router.get("/usage", summary="LLM 사용량 메트릭", description="프로세스 시작 이후 모든 LLM 호출의 토큰/비용/소요 시간을 그래프 노드별, 모델별로 반환합니다.")
+async def llm_usage():
+    return process_meter.summary()
+
+@router.get("/embedding_cache", summary="질의 임베딩 캐시 통계")
+async def embedding_cache_stats():
+    return recipe_embedding.stats()
+
+@router.get("/response_cache", summary="레시피 시맨틱 응답 캐시 통계")
+async def response_cache_stats():
+    return recipe_response_cache.stats()
+
+@router.get("/web_search", summary="웹 검색 캐시/서킷 브레이커 상태")
+async def web_search_stats():
+    return recipe_web_search.stats()
+
+@router.get("/opening_questions", summary="첫 진단 질문 풀 상태")
+async def opening_questions_stats():
+    return opening_questions.stats()
+
+@router.get("/diagnosis_sessions", summary="진단 세션 저장소 상태")
+async def diagnosis_sessions_stats():
+    return diagnosis_sessions.stats()
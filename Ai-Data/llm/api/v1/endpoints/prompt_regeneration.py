@@ -7,7 +7,7 @@ import json
 import core.config as config
 from model.recipe_model import get_recipe_llm
 from langchain_core.messages import SystemMessage
-from utils.prompt_loader import load_prompt
+from utils.prompt_loader import load_prompt, invalidate_prompt
 
 router = APIRouter()
 
@@ -57,6 +57,8 @@ async def regenerate_prompt(req: PromptRegenerationRequest):
         data[key]["input_variables"] = original_prompt.input_variables
         # input_variables는 변경하지 않음
         prompt_file_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        # 캐시된 템플릿 무효화 (다른 워커는 파일 mtime 변경으로 갱신)
+        invalidate_prompt(req.prompt_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"프롬프트 저장 실패: {e}")
 
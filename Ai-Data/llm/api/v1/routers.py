@@ -2,6 +2,9 @@ from fastapi import APIRouter
 
 from api.v1.endpoints.constitution_recipe import router as recipe_router
 from api.v1.endpoints.constitution_diagnose import router as diagnose_router
+from api.v1.endpoints.constitution_update import router as constitution_update_router
+from api.v1.endpoints.health import router as health_router
+from api.v1.endpoints.metrics import router as metrics_router
 
 api_router = APIRouter()
 
@@ -9,4 +12,13 @@ api_router = APIRouter()
 api_router.include_router(recipe_router, prefix="/constitution_recipe", tags=["chat"])
 
 # 체질 진단(RAG 기반) 라우터
-api_router.include_router(diagnose_router, prefix="/diagnose", tags=["diagnosis"]) 
\ No newline at end of file
+api_router.include_router(diagnose_router, prefix="/diagnose", tags=["diagnosis"])
+
+# 사용자 체질 진단 결과 저장 라우터 (PUT /users/{user_id}/constitution)
+api_router.include_router(constitution_update_router, prefix="/users", tags=["users"])
+
+# 서비스 상태(readiness) 라우터
+api_router.include_router(health_router, prefix="/health", tags=["health"])
+
+# LLM 사용량(토큰/비용) 메트릭 라우터
+api_router.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
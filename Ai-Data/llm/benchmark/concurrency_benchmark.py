@@ -0,0 +1,94 @@
+"""
+POST /api/v1/constitution_recipe 동시성 벤치마크
+
+단일 워커로 띄운 서비스에 동시 세션 수를 늘려가며 요청을 보내고,
+처리량(req/s)과 지연 시간(p50/p95)이 어떻게 변하는지 측정합니다.
+
+사용 예:
+    uvicorn main:app --host 0.0.0.0 --port 4567 --workers 1
+    python benchmark/concurrency_benchmark.py --url http://localhost:4567 --sessions 1 2 4 8 16 --requests 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    {"role": "user", "content": "저녁으로 먹을 만한 국 요리를 추천해 주세요."},
+]
+
+
+def build_payload(messages):
+    return {
+        "session_id": str(uuid.uuid4()),
+        "feature": "benchmark",
+        "messages": messages,
+        "allergies": [],
+        "constitution": "목양체질",
+        "dietary_restrictions": [],
+        "health_conditions": "",
+    }
+
+
+async def run_session(client: httpx.AsyncClient, url: str, requests_per_session: int, latencies: list, errors: list):
+    for _ in range(requests_per_session):
+        started = time.perf_counter()
+        try:
+            resp = await client.post(url, json=build_payload(DEFAULT_MESSAGES))
+            resp.raise_for_status()
+            if resp.json().get("error"):
+                errors.append(resp.json()["error"])
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_level(base_url: str, sessions: int, requests_per_session: int, timeout: float):
+    url = f"{base_url.rstrip('/')}/api/v1/constitution_recipe"
+    latencies: list = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            run_session(client, url, requests_per_session, latencies, errors)
+            for _ in range(sessions)
+        ])
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    p95_index = max(int(len(latencies) * 0.95) - 1, 0)
+    return {
+        "sessions": sessions,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p95": latencies[p95_index] if latencies else 0.0,
+    }
+
+
+async def main(args):
+    print(f"{'sessions':>8} {'requests':>8} {'errors':>6} {'elapsed(s)':>10} {'req/s':>8} {'p50(s)':>8} {'p95(s)':>8}")
+    baseline = None
+    for sessions in args.sessions:
+        result = await run_level(args.url, sessions, args.requests, args.timeout)
+        baseline = baseline or result["throughput"]
+        scaling = result["throughput"] / baseline if baseline else 0.0
+        print(
+            f"{result['sessions']:>8} {result['requests']:>8} {result['errors']:>6} "
+            f"{result['elapsed']:>10.2f} {result['throughput']:>8.2f} {result['p50']:>8.2f} {result['p95']:>8.2f}"
+            f"  (x{scaling:.2f})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="constitution_recipe 동시성 벤치마크")
+    parser.add_argument("--url", default="http://localhost:4567", help="Ai-Data 서비스 주소")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="동시 세션 수 목록")
+    parser.add_argument("--requests", type=int, default=3, help="세션당 요청 수")
+    parser.add_argument("--timeout", type=float, default=300.0, help="요청 타임아웃(초)")
+    asyncio.run(main(parser.parse_args()))
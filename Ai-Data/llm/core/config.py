@@ -1,11 +1,16 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     OPENAI_API_KEY: str = Field(..., alias="OPENAI_API_KEY")            # OpenAI API 키
     MONGODB_URI: str = Field(..., alias="MONGODB_URI")                 # MongoDB 연결 URL
     MONGODB_DB_NAME: str = Field(..., alias="MONGODB_DB_NAME")         # MongoDB DB 이름
+    MONGODB_MAX_POOL_SIZE: int = Field(50, alias="MONGODB_MAX_POOL_SIZE")  # MongoDB 커넥션 풀 최대 크기
+    MONGODB_MIN_POOL_SIZE: int = Field(0, alias="MONGODB_MIN_POOL_SIZE")  # MongoDB 커넥션 풀 최소 크기
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = Field(5000, alias="MONGODB_SERVER_SELECTION_TIMEOUT_MS")  # 서버 선택 제한 시간(ms)
+    MONGODB_CONNECT_TIMEOUT_MS: int = Field(5000, alias="MONGODB_CONNECT_TIMEOUT_MS")  # 연결 제한 시간(ms)
+    MONGODB_SOCKET_TIMEOUT_MS: int = Field(10000, alias="MONGODB_SOCKET_TIMEOUT_MS")  # 쿼리 응답 제한 시간(ms)
     DIAGNOSIS_MODEL_NAME: str = Field(..., alias="DIAGNOSIS_MODEL_NAME")      # 체질 진단에 사용할 LLM 모델 이름
     RECIPE_MODEL_NAME: str = Field(..., alias="RECIPE_MODEL_NAME")           # 레시피 생성에 사용할 LLM 모델 이름
     RECIPE_MODEL_COMPANY_NAME: str = Field(..., alias="RECIPE_MODEL_COMPANY_NAME") # 레시피 생성에 사용할 LLM 모델 회사 이름
@@ -21,6 +26,13 @@ class Settings(BaseSettings):
     CLAUDE_API_KEY: Optional[str] = Field(None, alias="CLAUDE_API_KEY")
     CONSTITUTION_DIAGNOSE_ANSWER_PROMPT_NAME: str = Field(..., alias="CONSTITUTION_DIAGNOSE_ANSWER_PROMPT_NAME")
     CONSTITUTION_DIAGNOSE_PROMPT_NAME: str = Field(..., alias="CONSTITUTION_DIAGNOSE_PROMPT_NAME")
+    DIAGNOSE_OPENING_POOL_SIZE: int = Field(8, alias="DIAGNOSE_OPENING_POOL_SIZE")  # 미리 생성해 둘 첫 진단 질문 수 (0이면 매번 생성)
+    DIAGNOSE_OPENING_REFRESH_SECONDS: float = Field(3600.0, alias="DIAGNOSE_OPENING_REFRESH_SECONDS")  # 첫 질문 풀 갱신 주기(초)
+    CONSTITUTION_DIAGNOSE_SUMMARY_PROMPT_NAME: str = Field("constitution_diagnose_summary", alias="CONSTITUTION_DIAGNOSE_SUMMARY_PROMPT_NAME")  # 진단 세션 이전 문진 요약 프롬프트
+    DIAGNOSE_SESSION_TTL_SECONDS: int = Field(3600, alias="DIAGNOSE_SESSION_TTL_SECONDS")  # 진단 세션 상태 유지 시간(초)
+    DIAGNOSE_SESSION_MAX_ENTRIES: int = Field(1000, alias="DIAGNOSE_SESSION_MAX_ENTRIES")  # 메모리에 둘 최대 진단 세션 수 (LRU 제거)
+    DIAGNOSE_SESSION_PERSIST: bool = Field(False, alias="DIAGNOSE_SESSION_PERSIST")  # 진단 세션을 MongoDB 에도 저장 (여러 워커/재시작 대비)
+    DIAGNOSE_SESSION_RECENT_TURNS: int = Field(4, alias="DIAGNOSE_SESSION_RECENT_TURNS")  # 요약 후 그대로 남길 최근 Q/A 수 (이 값의 두 배를 넘으면 요약)
     CONSTITUTION_RECIPE_BASE_PROMPT_NAME: str = Field(..., alias="CONSTITUTION_RECIPE_BASE_PROMPT_NAME")
     RECIPE_EVALUATE_QA_PROMPT_NAME: str = Field(..., alias="RECIPE_EVALUATE_QA_PROMPT_NAME")
     RECIPE_EVALUATE_RECIPE_PROMPT_NAME: str = Field(..., alias="RECIPE_EVALUATE_RECIPE_PROMPT_NAME")
@@ -34,6 +46,43 @@ class Settings(BaseSettings):
     CONSTITUTION_RECIPE_REWRITE_FOR_WEB_PROMPT_NAME: str = Field(..., alias="CONSTITUTION_RECIPE_REWRITE_FOR_WEB_PROMPT_NAME")
     CONSTITUTION_RECIPE_DOC_RELEVANCE_PROMPT_NAME: str = Field(..., alias="CONSTITUTION_RECIPE_DOC_RELEVANCE_PROMPT_NAME")
     CONSTITUTION_RECIPE_USER_CONTEXT_PROMPT_NAME: str = Field(..., alias="CONSTITUTION_RECIPE_USER_CONTEXT_PROMPT_NAME")
+    ASYNC_THREAD_POOL_SIZE: int = Field(8, alias="ASYNC_THREAD_POOL_SIZE")  # async 경로에서 동기 작업을 넘길 스레드 풀 크기
+    RECIPE_EVALUATION_SAMPLE_RATE: float = Field(1.0, alias="RECIPE_EVALUATION_SAMPLE_RATE")  # 백그라운드 레시피 평가 샘플링 비율 (0~1)
+    RECIPE_EVALUATION_WORKERS: int = Field(1, alias="RECIPE_EVALUATION_WORKERS")  # 백그라운드 평가 워커 수
+    RECIPE_EVALUATION_QUEUE_SIZE: int = Field(100, alias="RECIPE_EVALUATION_QUEUE_SIZE")  # 평가 대기열 최대 길이 (초과 시 버림)
+    RECIPE_CACHE_ENABLED: bool = Field(True, alias="RECIPE_CACHE_ENABLED")  # 레시피 응답 시맨틱 캐시 사용 여부
+    RECIPE_CACHE_SIMILARITY_THRESHOLD: float = Field(0.95, alias="RECIPE_CACHE_SIMILARITY_THRESHOLD")  # 캐시 적중으로 볼 최소 코사인 유사도
+    RECIPE_CACHE_TTL_SECONDS: int = Field(3600, alias="RECIPE_CACHE_TTL_SECONDS")  # 캐시 항목 유지 시간(초)
+    RECIPE_CACHE_MAX_ENTRIES: int = Field(512, alias="RECIPE_CACHE_MAX_ENTRIES")  # 캐시 최대 항목 수 (LRU 제거)
+    RECIPE_PREFILTER_ACCEPT_SCORE: float = Field(0.75, alias="RECIPE_PREFILTER_ACCEPT_SCORE")  # 섭생표 적합도가 이 이상이면 LLM 평가 없이 통과
+    RECIPE_PREFILTER_MIN_MATCHES: int = Field(2, alias="RECIPE_PREFILTER_MIN_MATCHES")  # 통과 판정에 필요한 최소 섭생표 매칭 재료 수
+    RECIPE_GRAPH_DEADLINE_SECONDS: float = Field(60.0, alias="RECIPE_GRAPH_DEADLINE_SECONDS")  # 레시피 그래프 한 번 실행의 시간 예산(초)
+    RECIPE_MAX_GENERATION_ATTEMPTS: int = Field(3, alias="RECIPE_MAX_GENERATION_ATTEMPTS")  # 생성→평가 최대 시도 횟수
+    RECIPE_ACCEPT_SCORE: float = Field(0.8, alias="RECIPE_ACCEPT_SCORE")  # 평가 점수가 이 값을 넘으면 통과
+    RECIPE_STAGE_MIN_REMAINING_SECONDS: float = Field(10.0, alias="RECIPE_STAGE_MIN_REMAINING_SECONDS")  # 남은 시간이 이보다 적으면 재생성/관련성 판단 생략
+    RECIPE_BEST_OF_N: int = Field(1, alias="RECIPE_BEST_OF_N")  # generate 단계에서 동시에 생성할 후보 수 (1이면 순차 재생성)
+    RECIPE_CANDIDATE_TEMPERATURES: List[float] = Field(default_factory=lambda: [0.7, 1.0, 0.3], alias="RECIPE_CANDIDATE_TEMPERATURES")  # 후보별 temperature (JSON, 후보 수보다 짧으면 반복)
+    RECIPE_SLOT_ROUTER_ENABLED: bool = Field(True, alias="RECIPE_SLOT_ROUTER_ENABLED")  # 슬롯 추출로 명확한 턴은 LLM 라우팅 생략
+    RECIPE_SPECULATIVE_RETRIEVAL_ENABLED: bool = Field(True, alias="RECIPE_SPECULATIVE_RETRIEVAL_ENABLED")  # 라우팅/대화 요약 중 마지막 사용자 발화로 미리 검색
+    RECIPE_SPECULATIVE_MIN_OVERLAP: float = Field(0.3, alias="RECIPE_SPECULATIVE_MIN_OVERLAP")  # 요약 질의와 토큰 겹침(Jaccard)이 이 이상이면 미리 검색한 결과 사용
+    RECIPE_VECTOR_INDEX_DIR: str = Field("./data/recipe_vector_index", alias="RECIPE_VECTOR_INDEX_DIR")  # 사전 구축 memmap 벡터 인덱스 경로 (없으면 Chroma 사용)
+    RECIPE_CONSTITUTION_RANK_WEIGHT: float = Field(0.2, alias="RECIPE_CONSTITUTION_RANK_WEIGHT")  # 검색 순위에 더할 체질 적합도 가중치
+    RECIPE_CONSTITUTION_FORBIDDEN_PENALTY: float = Field(0.1, alias="RECIPE_CONSTITUTION_FORBIDDEN_PENALTY")  # 체질 금기(XX) 재료 포함 레시피 순위 감점
+    RECIPE_EMBEDDING_CACHE_PATH: str = Field("./data/embedding_cache.sqlite3", alias="RECIPE_EMBEDDING_CACHE_PATH")  # 질의 임베딩 SQLite 캐시 경로 (빈 값이면 메모리만 사용)
+    RECIPE_EMBEDDING_CACHE_MAX_ENTRIES: int = Field(2048, alias="RECIPE_EMBEDDING_CACHE_MAX_ENTRIES")  # 메모리 LRU 최대 항목 수
+    RECIPE_EMBEDDING_BATCH_WINDOW_MS: int = Field(10, alias="RECIPE_EMBEDDING_BATCH_WINDOW_MS")  # 동시 미스를 한 번의 요청으로 묶는 대기 시간(ms)
+    WEB_SEARCH_PROVIDER: str = Field("duckduckgo", alias="WEB_SEARCH_PROVIDER")  # 웹 검색 provider (duckduckgo / local)
+    WEB_SEARCH_LOCAL_PATH: str = Field("./data/web_search_fixtures.json", alias="WEB_SEARCH_LOCAL_PATH")  # local provider 검색 결과 파일
+    WEB_SEARCH_LOCAL_LATENCY_SECONDS: float = Field(0.0, alias="WEB_SEARCH_LOCAL_LATENCY_SECONDS")  # local provider 인위 지연 (벤치마크용)
+    WEB_SEARCH_TIMEOUT_SECONDS: float = Field(5.0, alias="WEB_SEARCH_TIMEOUT_SECONDS")  # 웹 검색 호출당 제한 시간(초)
+    WEB_SEARCH_CACHE_TTL_SECONDS: int = Field(1800, alias="WEB_SEARCH_CACHE_TTL_SECONDS")  # 웹 검색 결과 캐시 유지 시간(초)
+    WEB_SEARCH_CACHE_MAX_ENTRIES: int = Field(256, alias="WEB_SEARCH_CACHE_MAX_ENTRIES")  # 웹 검색 결과 캐시 최대 항목 수
+    WEB_SEARCH_FAILURE_THRESHOLD: int = Field(3, alias="WEB_SEARCH_FAILURE_THRESHOLD")  # 연속 실패 시 서킷 브레이커를 여는 횟수
+    WEB_SEARCH_COOLDOWN_SECONDS: float = Field(60.0, alias="WEB_SEARCH_COOLDOWN_SECONDS")  # 서킷 브레이커가 검색을 건너뛰는 시간(초)
+    LLM_PROVIDER_CONCURRENCY: Dict[str, int] = Field(default_factory=lambda: {"openai": 8, "gemini": 4, "claude": 4}, alias="LLM_PROVIDER_CONCURRENCY")  # provider별 동시 LLM 호출 수 (JSON)
+    LLM_DEFAULT_CONCURRENCY: int = Field(4, alias="LLM_DEFAULT_CONCURRENCY")  # 목록에 없는 provider의 동시 호출 수
+    AUTO_GENERATE_CONCURRENCY: int = Field(4, alias="AUTO_GENERATE_CONCURRENCY")  # 자동 레시피 일괄 생성 시 동시 생성 수 (요청값의 상한)
+    AUTO_GENERATE_MAX_BATCH: int = Field(100, alias="AUTO_GENERATE_MAX_BATCH")  # 자동 레시피 일괄 생성 한 번에 받을 최대 조건 수
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -72,4 +121,16 @@ CONSTITUTION_RECIPE_BASE_GENERATE_PROMPT_NAME = settings.CONSTITUTION_RECIPE_BAS
 CONSTITUTION_RECIPE_HISTORY_ABSTRACT_PROMPT_NAME = settings.CONSTITUTION_RECIPE_HISTORY_ABSTRACT_PROMPT_NAME
 CONSTITUTION_RECIPE_REWRITE_FOR_WEB_PROMPT_NAME = settings.CONSTITUTION_RECIPE_REWRITE_FOR_WEB_PROMPT_NAME
 CONSTITUTION_RECIPE_DOC_RELEVANCE_PROMPT_NAME = settings.CONSTITUTION_RECIPE_DOC_RELEVANCE_PROMPT_NAME
-CONSTITUTION_RECIPE_USER_CONTEXT_PROMPT_NAME = settings.CONSTITUTION_RECIPE_USER_CONTEXT_PROMPT_NAME
\ No newline at end of file
+CONSTITUTION_RECIPE_USER_CONTEXT_PROMPT_NAME = settings.CONSTITUTION_RECIPE_USER_CONTEXT_PROMPT_NAME
+ASYNC_THREAD_POOL_SIZE = settings.ASYNC_THREAD_POOL_SIZE
+RECIPE_EVALUATION_SAMPLE_RATE = settings.RECIPE_EVALUATION_SAMPLE_RATE
+RECIPE_EVALUATION_WORKERS = settings.RECIPE_EVALUATION_WORKERS
+RECIPE_EVALUATION_QUEUE_SIZE = settings.RECIPE_EVALUATION_QUEUE_SIZE
+RECIPE_CACHE_ENABLED = settings.RECIPE_CACHE_ENABLED
+RECIPE_CACHE_SIMILARITY_THRESHOLD = settings.RECIPE_CACHE_SIMILARITY_THRESHOLD
+RECIPE_CACHE_TTL_SECONDS = settings.RECIPE_CACHE_TTL_SECONDS
+RECIPE_CACHE_MAX_ENTRIES = settings.RECIPE_CACHE_MAX_ENTRIES
+RECIPE_PREFILTER_ACCEPT_SCORE = settings.RECIPE_PREFILTER_ACCEPT_SCORE
+RECIPE_PREFILTER_MIN_MATCHES = settings.RECIPE_PREFILTER_MIN_MATCHES
+LLM_PROVIDER_CONCURRENCY = settings.LLM_PROVIDER_CONCURRENCY
+LLM_DEFAULT_CONCURRENCY = settings.LLM_DEFAULT_CONCURRENCY
@@ -0,0 +1,38 @@
+# db/mongo.py -- Ai-Data 서비스 공용 MongoDB(Motor) 클라이언트, FastAPI lifespan 에서 연결/종료
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from core.config import settings
+
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+
+def connect_mongo():
+    """커넥션 풀 크기/제한 시간을 설정한 클라이언트를 생성합니다. 실제 연결은 첫 요청 시 이루어집니다."""
+    global client, db
+    if client is not None:
+        return
+    client = AsyncIOMotorClient(
+        settings.MONGODB_URI,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+    )
+    db = client[settings.MONGODB_DB_NAME]
+    print(f"MongoDB 클라이언트 생성: {settings.MONGODB_DB_NAME} (maxPoolSize={settings.MONGODB_MAX_POOL_SIZE})")
+
+
+def close_mongo():
+    global client, db
+    if client is not None:
+        client.close()
+        print("MongoDB 연결 종료")
+    client, db = None, None
+
+
+def get_collection(collection_name: str) -> AsyncIOMotorCollection:
+    if db is None:
+        raise RuntimeError("MongoDB 데이터베이스에 연결되지 않았습니다.")
+    return db[collection_name]
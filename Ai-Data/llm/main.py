@@ -1,12 +1,40 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from api.v1.routers import api_router
 import core.config as config
 from core.config import settings
+from db.mongo import connect_mongo, close_mongo
+from model.recipe_model import warmup_recipe_llms
+from utils.evaluator.evaluation_worker import start_evaluation_workers, stop_evaluation_workers
+from api.v1.endpoints.constitution_diagnose import opening_questions
 import os
+
+async def _warmup():
+    try:
+        await asyncio.to_thread(warmup_recipe_llms)
+    except Exception as e:
+        print(f"recipe llm registry warm-up 실패: {e}")
+
+# 앱 시작 시 MongoDB 클라이언트 생성, LLM 클라이언트/그래프 warm-up (완료 전까지 /health/ready 는 503)
+# 및 백그라운드 레시피 평가 워커, 첫 진단 질문 풀 갱신 실행
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_mongo()
+    warmup_task = asyncio.create_task(_warmup())
+    start_evaluation_workers()
+    opening_questions.start()
+    yield
+    warmup_task.cancel()
+    await opening_questions.stop()
+    await stop_evaluation_workers()
+    close_mongo()
+
 app = FastAPI(
     title="LLM Microservice",
     description="Microservice for LLM and RAG based constitution diagnosis and chat",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 os.environ["LANGCHAIN_TRACING_V2"] = "true"
@@ -1,8 +1,10 @@
 from core.config import settings
 from langchain_openai import ChatOpenAI
+from utils.metering import metering_handler
 
 # 체질 진단용 LLM 초기화
 constitution_llm = ChatOpenAI(
     model_name=settings.DIAGNOSIS_MODEL_NAME,
-    openai_api_key=settings.OPENAI_API_KEY
+    openai_api_key=settings.OPENAI_API_KEY,
+    callbacks=[metering_handler]
 ) 
\ No newline at end of file
@@ -1,14 +1,33 @@
+import threading
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_anthropic import ChatAnthropic
 from core.config import settings
+from utils.metering import metering_handler
 
-def get_llm(provider: str, model_name: str):
-    """provider와 model_name에 따라 LLM 인스턴스를 반환합니다."""
+# (provider, model_name) 별로 생성된 클라이언트를 재사용 (커넥션 풀/TLS 세션 유지)
+_llm_cache: dict = {}
+_llm_cache_lock = threading.Lock()
+
+def _create_llm(provider: str, model_name: str):
     # 현재는 OpenAI만 지원, 추후 Gemini/Claude 지원 가능
+    # 모든 클라이언트에 사용량 계측 콜백을 붙임 (스트리밍 시에도 토큰 수를 받도록 stream_usage 사용)
     if provider == 'openai':
-        return ChatOpenAI(model_name=model_name, openai_api_key=settings.OPENAI_API_KEY)
+        return ChatOpenAI(model_name=model_name, openai_api_key=settings.OPENAI_API_KEY, stream_usage=True, callbacks=[metering_handler])
     elif provider == 'gemini':
-        return ChatGoogleGenerativeAI(model_name=model_name, google_api_key=settings.GEMINI_API_KEY)
+        return ChatGoogleGenerativeAI(model_name=model_name, google_api_key=settings.GEMINI_API_KEY, callbacks=[metering_handler])
     elif provider == 'claude':
-        return ChatAnthropic(model_name=model_name, anthropic_api_key=settings.CLAUDE_API_KEY)
\ No newline at end of file
+        return ChatAnthropic(model_name=model_name, anthropic_api_key=settings.CLAUDE_API_KEY, callbacks=[metering_handler])
+
+def get_llm(provider: str, model_name: str):
+    """provider와 model_name에 따라 LLM 인스턴스를 반환합니다. 프로세스 내에서 한 번만 생성합니다."""
+    key = (provider, model_name)
+    llm = _llm_cache.get(key)
+    if llm is None:
+        with _llm_cache_lock:
+            llm = _llm_cache.get(key)
+            if llm is None:
+                llm = _create_llm(provider, model_name)
+                if llm is not None:
+                    _llm_cache[key] = llm
+    return llm
@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 from core.config import settings
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph
@@ -8,38 +11,100 @@ from typing import Literal
 from pydantic import BaseModel, Field
 from model.get_llm import get_llm
 from langgraph.graph import START, END
-from langchain_community.tools import DuckDuckGoSearchRun
+from langgraph.constants import TAG_NOSTREAM
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.runnables import RunnableLambda
 from utils.prompt_loader import load_prompt
-from utils.retriever import recipe_retriever
-from langchain import hub
-from typing import TypedDict
+from utils.retriever import retrieve_recipes, aretrieve_recipes
+from typing import Any, TypedDict, Optional
 from prompt.get_prompt import get_prompt
+from utils.metering import metering_handler
+from utils.slot_router import route_by_slots, last_user_text
+from utils.bm25_index import korean_ngram_tokenize
+from utils.web_search import recipe_web_search
+from utils.seoupseng_table import get_seoupseng_table, extract_ingredients
+
+# 프로세스 단위 레지스트리: 그래프/LLM 클라이언트를 한 번만 생성해 재사용
+_recipe_llm_registry: dict = {}
+_recipe_llm_registry_lock = threading.Lock()
+_recipe_llm_ready = threading.Event()
+
+def _prompt_version():
+    """그래프 컴파일에 사용되는 프롬프트 설정 묶음 (레지스트리 키의 일부)"""
+    return (
+        settings.CONSTITUTION_RECIPE_ROUTE_SYSTEM_PROMPT_NAME,
+        settings.CONSTITUTION_RECIPE_BASE_ASK_PROMPT_NAME,
+        settings.CONSTITUTION_RECIPE_HISTORY_ABSTRACT_PROMPT_NAME,
+        settings.CONSTITUTION_RECIPE_REWRITE_FOR_WEB_PROMPT_NAME,
+        settings.CONSTITUTION_RECIPE_DOC_RELEVANCE_PROMPT_NAME,
+    )
+
+def _registry_key(model_name: str):
+    return (model_name, settings.RECIPE_MODEL_COMPANY_NAME, settings.RECIPE_MODEL_NAME, _prompt_version())
 
 def get_recipe_llm(model_name: str,):
-    if model_name == "recipe_llm":
-        return recipe_llm()
-    elif model_name == "recipe_evaluate_llm":
-        return recipe_evaluate_llm()
-    elif model_name == "recipe_generate_llm_graph":
-        return recipe_graph_llm()
+    """model_name에 해당하는 LLM/그래프를 레지스트리에서 꺼내고, 없으면 한 번만 생성합니다."""
+    factory = _RECIPE_LLM_FACTORIES.get(model_name)
+    if factory is None:
+        return None
+    key = _registry_key(model_name)
+    instance = _recipe_llm_registry.get(key)
+    if instance is None:
+        with _recipe_llm_registry_lock:
+            instance = _recipe_llm_registry.get(key)
+            if instance is None:
+                print(f"recipe llm registry 생성: {model_name}")
+                instance = factory()
+                _recipe_llm_registry[key] = instance
+    return instance
+
+def warmup_recipe_llms():
+    """FastAPI 시작 시 사용 중인 그래프/클라이언트를 미리 생성합니다."""
+    for model_name in dict.fromkeys([settings.RECIPE_LLM_NAME, settings.RECIPE_EVALUATE_LLM_NAME]):
+        get_recipe_llm(model_name)
+    get_llm(settings.RECIPE_MODEL_COMPANY_NAME, settings.RECIPE_MODEL_NAME)
+    _recipe_llm_ready.set()
+    print("recipe llm registry warm-up 완료")
+
+def is_recipe_llm_ready() -> bool:
+    return _recipe_llm_ready.is_set()
+
+def clear_recipe_llm_registry():
+    """레지스트리를 비웁니다. 이후 호출 시 다시 생성됩니다."""
+    with _recipe_llm_registry_lock:
+        _recipe_llm_registry.clear()
 
 def recipe_llm():
     return ChatOpenAI(
             model_name=settings.RECIPE_MODEL_NAME,
-            openai_api_key=settings.OPENAI_API_KEY)
+            openai_api_key=settings.OPENAI_API_KEY,
+            stream_usage=True,
+            callbacks=[metering_handler])
 
 def recipe_evaluate_llm():
     return ChatOpenAI(
             model_name=settings.RECIPE_MODEL_NAME,
-            openai_api_key=settings.OPENAI_API_KEY)
+            openai_api_key=settings.OPENAI_API_KEY,
+            callbacks=[metering_handler])
 
 class RecipeAgentState(TypedDict):
     query: list[dict]
     context: list
     answer: str
+    constitution: Optional[str]
+    # 요청에 함께 온 사용자 정보 (슬롯 라우터가 채워진 슬롯으로 인정)
+    profile: Optional[dict]
+    route: Optional[str]
+    # 지연 시간 예산: 요청 마감 시각(time.time 기준)과 생성/평가 시도 횟수, 지금까지의 최고 후보
+    deadline: float
+    attempts: int
+    score: Optional[float]
+    best_answer: Optional[Any]
+    best_score: float
+    # 라우팅 중 시작한 추측 검색: (검색 질의, asyncio.Task)
+    speculative: Optional[Any]
 
 ### 레시피 진단 워크플로우
 class Route(BaseModel):
@@ -64,6 +129,38 @@ class Recipe(BaseModel):
     nutritionalInfo: str = Field(..., description="영양 정보")
 
 
+def prefilter_recipe(state: RecipeAgentState) -> Optional[Literal["retry", "accept"]]:
+    """
+    섭생표 점수 행렬로 생성된 레시피를 LLM 호출 없이 먼저 판정합니다.
+    - 대상 체질에 XX 재료가 있으면 즉시 retry
+    - 적합도가 충분히 높으면 accept
+    - 체질을 모르거나 애매하면 None (LLM 평가로 넘김)
+    """
+    result = get_seoupseng_table().score(extract_ingredients(state["answer"]), state.get("constitution"))
+    if result is None:
+        return None
+    print("prefilter score:", result.score, "forbidden:", result.has_forbidden)
+    if result.has_forbidden:
+        return "retry"
+    if result.score >= settings.RECIPE_PREFILTER_ACCEPT_SCORE and len(result.matched_rows) >= settings.RECIPE_PREFILTER_MIN_MATCHES:
+        return "accept"
+    return None
+
+
+def remaining_seconds(state: RecipeAgentState) -> float:
+    """요청 마감까지 남은 시간(초). 마감이 없으면 무한대"""
+    deadline = state.get("deadline")
+    return float("inf") if not deadline else deadline - time.time()
+
+
+def query_overlap(a: str, b: str) -> float:
+    """두 질의의 토큰(어절 + 한글 bigram) 집합 Jaccard 유사도"""
+    tokens_a, tokens_b = set(korean_ngram_tokenize(a or "")), set(korean_ngram_tokenize(b or ""))
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
 def recipe_graph_llm():
     llm = get_llm(settings.RECIPE_MODEL_COMPANY_NAME, settings.RECIPE_MODEL_NAME)
 
@@ -76,29 +173,93 @@ def recipe_graph_llm():
 
 
     structured_llm = llm.with_structured_output(Route)
-    def route_classify(state: RecipeAgentState) -> Literal["recipe_gen", "ask_llm"]:
-        query = state["query"]
-        print("route_classify 진입")
-        router_chain = router_prompt | structured_llm
-        route = router_chain.invoke({"query": query})
+    router_chain = router_prompt | structured_llm
+    # 동기/비동기 노드 쌍은 체인 구성과 결과 처리를 공유하고 invoke/ainvoke 호출만 다름
+    def classified_route(route: Route) -> Literal["recipe_gen", "ask_llm"]:
         print("route_classify 지나감")
         print("route target:", route.target)
         return route.target
 
+    def route_classify(state: RecipeAgentState) -> Literal["recipe_gen", "ask_llm"]:
+        print("route_classify 진입")
+        return classified_route(router_chain.invoke({"query": state["query"]}))
+
+    async def aroute_classify(state: RecipeAgentState) -> Literal["recipe_gen", "ask_llm"]:
+        print("route_classify 진입")
+        return classified_route(await router_chain.ainvoke({"query": state["query"]}))
+
+    def local_route(state: RecipeAgentState) -> Optional[str]:
+        # 필수 슬롯이 명확히 채워졌거나 비어 있으면 LLM 분류 없이 결정
+        if not settings.RECIPE_SLOT_ROUTER_ENABLED:
+            return None
+        slot_route = route_by_slots(state["query"], state.get("profile"))
+        print("slot router:", slot_route.route, slot_route.slots)
+        return slot_route.route
+
+    def start_budget(state: RecipeAgentState) -> dict:
+        # 첫 노드에서 요청 마감 시각과 재시도 예산을 초기화 (호출자가 deadline 을 넘기면 그대로 사용)
+        return {
+            "deadline": state.get("deadline") or time.time() + settings.RECIPE_GRAPH_DEADLINE_SECONDS,
+            "attempts": 0,
+            "score": None,
+            "best_answer": None,
+            "best_score": -1.0,
+        }
+
     def route_agent(state: RecipeAgentState):
-        # state update: only set query to classification result
-        classification = route_classify(state)
-        return {"query": classification}
+        # 분류 결과는 query 를 덮어쓰지 않고 route 에 저장 (분기 함수에서 재사용)
+        budget = start_budget(state)
+        return {**budget, "route": local_route(state) or route_classify(state)}
+
+    def start_speculative_retrieval(state: RecipeAgentState):
+        # 라우팅/대화 요약(LLM 호출)과 겹치도록 마지막 사용자 발화로 검색을 먼저 시작
+        if not settings.RECIPE_SPECULATIVE_RETRIEVAL_ENABLED:
+            return None
+        query = last_user_text(state["query"])
+        if not query.strip():
+            return None
+        task = asyncio.create_task(aretrieve_recipes(query, state.get("constitution")))
+        # 결과를 쓰지 않고 끝나는 경우에도 검색 예외가 'never retrieved' 경고로 남지 않도록 소비
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return query, task
+
+    def cancel_speculative(speculative):
+        if speculative is not None:
+            speculative[1].cancel()
+
+    async def aroute_agent(state: RecipeAgentState):
+        budget = start_budget(state)
+        route = local_route(state)
+        speculative = start_speculative_retrieval(state) if route != "ask_llm" else None
+        if route is None:
+            try:
+                route = await aroute_classify(state)
+            except BaseException:
+                cancel_speculative(speculative)
+                raise
+        if route == "ask_llm":
+            # 추가 질문으로 끝나는 턴이면 검색 결과가 필요 없으므로 버림
+            cancel_speculative(speculative)
+            speculative = None
+        return {**budget, "route": route, "speculative": speculative}
+
+    def routed(state: RecipeAgentState) -> Literal["recipe_gen", "ask_llm"]:
+        return state["route"]
+
+    def ask_chain():
+        """사용자의 추가 정보를 얻기 위한 후속 질문 생성 체인"""
+        ask_prompt = get_prompt(settings.CONSTITUTION_RECIPE_BASE_ASK_PROMPT_NAME)
+        return ask_prompt | llm | StrOutputParser()
 
     def ask_llm(state: RecipeAgentState):
-        """
-        사용자의 추가 정보를 얻기 위한 후속 질문 생성
-        """
-        query = state["query"]
         print("ask_llm 진입")
-        ask_prompt = get_prompt(settings.CONSTITUTION_RECIPE_BASE_ASK_PROMPT_NAME)
-        ask_abstract_chain = ask_prompt | llm | StrOutputParser()
-        response = ask_abstract_chain.invoke({"query": query})
+        response = ask_chain().invoke({"query": state["query"]})
+        print("ask_llm 지나감")
+        return {"query": response}
+
+    async def aask_llm(state: RecipeAgentState):
+        print("ask_llm 진입")
+        response = await ask_chain().ainvoke({"query": state["query"]})
         print("ask_llm 지나감")
         return {"query": response}
 
@@ -109,7 +270,7 @@ def recipe_graph_llm():
         사용자의 질문에 기반하여 벡터 스토어에서 문서 검색
         """
         query = state['query']
-        docs = recipe_retriever.invoke(query)
+        docs = retrieve_recipes(query, state.get("constitution"))
         # return {"retrieve_context", docs}
         print("retrieve docs: ")
         print(docs)
@@ -117,85 +278,138 @@ def recipe_graph_llm():
         
         return {"context": docs}
 
+    async def take_speculative(state: RecipeAgentState):
+        """요약된 질의가 추측 검색 질의와 충분히 비슷하면 그 결과를 사용, 아니면 취소하고 None"""
+        speculative = state.get("speculative")
+        if speculative is None:
+            return None
+        speculative_query, task = speculative
+        overlap = query_overlap(state["query"], speculative_query)
+        print("speculative retrieve overlap:", round(overlap, 2))
+        if overlap < settings.RECIPE_SPECULATIVE_MIN_OVERLAP:
+            task.cancel()
+            return None
+        try:
+            return await task
+        except Exception as e:
+            print(f"speculative retrieve 실패: {e}")
+            return None
+
+    async def aretrieve(state: RecipeAgentState):
+        query = state['query']
+        docs = await take_speculative(state)
+        if docs is None:
+            docs = await aretrieve_recipes(query, state.get("constitution"))
+        print("retrieve docs: ")
+        print(docs)
+        print("retrieve 지나감")
+        return {"context": docs, "speculative": None}
+
 
 
+    def history_abstract_chain():
+        history_abstract_prompt = get_prompt(settings.CONSTITUTION_RECIPE_HISTORY_ABSTRACT_PROMPT_NAME)
+        return history_abstract_prompt | llm | StrOutputParser()
+
     def history_abstract(state: RecipeAgentState):
-        query = state["query"]
         print("history_abstract 진입")
-        history_abstract_prompt = get_prompt(settings.CONSTITUTION_RECIPE_HISTORY_ABSTRACT_PROMPT_NAME)
-        history_abstract_chain = history_abstract_prompt | llm | StrOutputParser()
-        response = history_abstract_chain.invoke({"query": query})
+        response = history_abstract_chain().invoke({"query": state["query"]})
+        print("history_abstract 지나감")
+        return {"query": response}
+
+    async def ahistory_abstract(state: RecipeAgentState):
+        print("history_abstract 진입")
+        try:
+            response = await history_abstract_chain().ainvoke({"query": state["query"]})
+        except BaseException:
+            # 요약이 실패하면 retrieve 까지 가지 않으므로 추측 검색도 취소
+            cancel_speculative(state.get("speculative"))
+            raise
         print("history_abstract 지나감")
         return {"query": response}
 
 
     def rewrite_query_for_web(state: RecipeAgentState):
         rewirte_for_web_prompt = get_prompt(settings.CONSTITUTION_RECIPE_REWRITE_FOR_WEB_PROMPT_NAME)
-        duck_web_search_tool = DuckDuckGoSearchRun()
         query = state["query"]
         rewrite_for_web_chain = rewirte_for_web_prompt | llm | StrOutputParser()
         response = rewrite_for_web_chain.invoke({"query": query})
         return {"query": response}
 
     def web_search(state: RecipeAgentState):
-        duck_web_search_tool = DuckDuckGoSearchRun()
+        # 캐시/제한 시간/서킷 브레이커 적용, 실패 시 빈 context 로 생성 단계 진행
         query = state["query"]
-        result = duck_web_search_tool.invoke(query)
+        result = recipe_web_search.search(query)
         print("web_search 지나감")
         
         return {"context": result}
 
+    async def aweb_search(state: RecipeAgentState):
+        query = state["query"]
+        result = await recipe_web_search.asearch(query)
+        print("web_search 지나감")
+        return {"context": result}
 
-    def check_recipe_relevance(state: RecipeAgentState):
+
+    def skip_relevance(state: RecipeAgentState) -> bool:
+        # 남은 시간이 부족하면 관련성 판단/웹 검색을 건너뛰고 검색 결과로 바로 생성
+        if remaining_seconds(state) < settings.RECIPE_STAGE_MIN_REMAINING_SECONDS:
+            print("check_recipe_relevance 생략: 남은 시간 부족")
+            return True
+        return False
+
+    def relevance_chain():
         doc_relevance_prompt = get_prompt(settings.CONSTITUTION_RECIPE_DOC_RELEVANCE_PROMPT_NAME)
-        """주어진 state 를 기반으로 문서의 관련성 판단"""
-        query = state["query"]
-        context = state["context"]
-        # retrieve_context = state["retrieve_context"]
-        # chain
-        relevance_chain = doc_relevance_prompt | llm
-        response = relevance_chain.invoke({"question": query, "documents": context})
-        
+        return doc_relevance_prompt | llm
+
+    def relevance_route(response) -> Literal["relevant", "no_relevant"]:
         if response["Score"] == 1:
             print("checked: relevent")
             return "relevant"
-
         print("checked: no relevent")
         print("check_recipe_relevance 지나감")
         return "no_relevant"
 
+    def check_recipe_relevance(state: RecipeAgentState):
+        """주어진 state 를 기반으로 문서의 관련성 판단"""
+        if skip_relevance(state):
+            return "relevant"
+        return relevance_route(relevance_chain().invoke({"question": state["query"], "documents": state["context"]}))
+
+    async def acheck_recipe_relevance(state: RecipeAgentState):
+        if skip_relevance(state):
+            return "relevant"
+        return relevance_route(await relevance_chain().ainvoke({"question": state["query"], "documents": state["context"]}))
 
 
+    def generate_chain(temperature: Optional[float] = None):
+        """레시피 생성 체인 (generate 노드와 best-of-N 후보가 함께 사용)"""
+        recipe_prompt = get_prompt("constitution_recipe_base_generate_best")
+        generate_llm = llm if temperature is None else llm.bind(temperature=temperature)
+        return recipe_prompt | generate_llm | PydanticOutputParser(pydantic_object=Recipe)
 
     def generate(state: RecipeAgentState):
-        recipe_prompt = get_prompt("constitution_recipe_base_generate_best")
-        query = state["query"]
-        # retrieve_context = state["retrieve_context"]
-        # web_search_context = state["web_search_context"] # 삭제가능
-        context = state["context"]
-        # chain
-        """ 
-        - 필요시 small_llm -> nano_llm
-        *** output 에 따라 StrOutputParser() 수정 *** 
-        
-        """
-        recipe_rag_chain = recipe_prompt | llm | PydanticOutputParser(pydantic_object=Recipe)
-        response = recipe_rag_chain.invoke({"query": query, "context": context})
+        response = generate_chain().invoke({"query": state["query"], "context": state["context"]})
+        print("generate 지나감")
+        return {"answer": response}
+
+    async def agenerate(state: RecipeAgentState):
+        response = await generate_chain().ainvoke({"query": state["query"], "context": state["context"]})
         print("generate 지나감")
         return {"answer": response}
 
 
-    graph_builder.add_node('retrieve', retrieve)
-    graph_builder.add_node('history_abstract', history_abstract)
-    graph_builder.add_node('generate', generate)
-    graph_builder.add_node("web_search", web_search)
-    graph_builder.add_node('ask_llm', ask_llm)
-    graph_builder.add_node('route_agent', route_agent)
+    # 각 노드/분기는 동기(invoke)와 비동기(ainvoke/astream) 구현을 함께 가짐
+    graph_builder.add_node('retrieve', RunnableLambda(retrieve, afunc=aretrieve))
+    graph_builder.add_node('history_abstract', RunnableLambda(history_abstract, afunc=ahistory_abstract))
+    graph_builder.add_node("web_search", RunnableLambda(web_search, afunc=aweb_search))
+    graph_builder.add_node('ask_llm', RunnableLambda(ask_llm, afunc=aask_llm))
+    graph_builder.add_node('route_agent', RunnableLambda(route_agent, afunc=aroute_agent))
 
     graph_builder.add_edge(START, 'route_agent')
     graph_builder.add_conditional_edges(
         'route_agent',
-        route_classify,
+        routed,
         {
             'ask_llm': 'ask_llm',
             'recipe_gen': 'history_abstract'
@@ -205,28 +419,169 @@ def recipe_graph_llm():
     graph_builder.add_edge('history_abstract', 'retrieve')
     graph_builder.add_conditional_edges(
         "retrieve",
-        check_recipe_relevance,
+        RunnableLambda(check_recipe_relevance, afunc=acheck_recipe_relevance),
         {
             "relevant": "generate",
             "no_relevant": "web_search"
         }
     )
     graph_builder.add_edge("web_search", "generate")
-    # generate 후 평가: score <= 0.8이면 재생성(retry), 그렇지 않으면 종료(accept)
-    def evaluate_recipe_score(state: RecipeAgentState) -> Literal["retry", "accept"]:
-        from utils.evaluator.recipe_evaluator import evaluate_recipe
-        _, score = evaluate_recipe(state["query"], state["answer"])
-        print("evaluate_recipe score:", score)
-        return "retry" if score <= 0.8 else "accept"
-    graph_builder.add_conditional_edges(
-        "generate",
-        evaluate_recipe_score,
-        {
-            "retry": "generate",
-            "accept": END
-        }
-    )
+
+    # generate 후 평가: 섭생표 사전 판정 → 애매한 경우에만 LLM 평가
+    # 평가 결과로 최고 후보를 갱신하고, 통과(score > 기준)하거나 재시도 예산/시간이 다하면 최고 후보로 종료
+    def record_evaluation(state: RecipeAgentState, score: float) -> dict:
+        update = {"score": score, "attempts": state.get("attempts", 0) + 1}
+        if score > state.get("best_score", -1.0):
+            update.update({"best_answer": state["answer"], "best_score": score})
+        print("evaluate score:", score, "attempts:", update["attempts"], "remaining:", round(remaining_seconds(state), 1))
+        return update
+
+    def prefilter_score(state: RecipeAgentState) -> Optional[float]:
+        decision = prefilter_recipe(state)
+        if decision is None:
+            return None
+        # 섭생표 판정은 accept → 만점, retry(금기 재료 포함) → 0점으로 기록
+        return 1.0 if decision == "accept" else 0.0
+
+    def score_candidate(state: RecipeAgentState) -> float:
+        score = prefilter_score(state)
+        if score is None:
+            from utils.evaluator.recipe_evaluator import evaluate_recipe
+            _, score = evaluate_recipe(state["query"], state["answer"], state.get("constitution"))
+        return score
+
+    async def ascore_candidate(state: RecipeAgentState) -> float:
+        score = prefilter_score(state)
+        if score is None:
+            from utils.evaluator.recipe_evaluator import aevaluate_recipe
+            _, score = await aevaluate_recipe(state["query"], state["answer"], state.get("constitution"))
+        return score
+
+    def evaluate(state: RecipeAgentState):
+        return record_evaluation(state, score_candidate(state))
+
+    async def aevaluate(state: RecipeAgentState):
+        return record_evaluation(state, await ascore_candidate(state))
+
+    def after_evaluate(state: RecipeAgentState) -> Literal["retry", "finalize"]:
+        if state["score"] > settings.RECIPE_ACCEPT_SCORE:
+            return "finalize"
+        if state["attempts"] >= settings.RECIPE_MAX_GENERATION_ATTEMPTS:
+            print("재생성 중단: 시도 횟수 초과")
+            return "finalize"
+        if remaining_seconds(state) < settings.RECIPE_STAGE_MIN_REMAINING_SECONDS:
+            print("재생성 중단: 남은 시간 부족")
+            return "finalize"
+        return "retry"
+
+    def finalize(state: RecipeAgentState):
+        # 통과하지 못했더라도 지금까지 가장 점수가 높은 후보를 응답으로 사용
+        return {"answer": state.get("best_answer") or state["answer"]}
+
+    # best-of-N: 후보 N개를 temperature 를 달리해 동시에 생성하고, 끝나는 대로 채점해
+    # 기준을 넘는 첫 후보를 채택하고 나머지는 취소 (토큰을 더 쓰는 대신 어려운 요청의 지연을 줄임)
+    def candidate_temperatures(state: RecipeAgentState) -> list:
+        # 한 라운드의 후보 수는 남은 생성 시도 예산(RECIPE_MAX_GENERATION_ATTEMPTS - attempts)을 넘지 않음
+        temperatures = settings.RECIPE_CANDIDATE_TEMPERATURES or [None]
+        budget = settings.RECIPE_MAX_GENERATION_ATTEMPTS - state.get("attempts", 0)
+        count = max(min(settings.RECIPE_BEST_OF_N, budget), 1)
+        return [temperatures[i % len(temperatures)] for i in range(count)]
+
+    # 동시에 생성되는 후보들의 토큰이 섞이지 않도록 후보 호출은 messages 스트림에서 제외
+    CANDIDATE_CONFIG = {"tags": [TAG_NOSTREAM]}
+
+    def record_candidates(state: RecipeAgentState, scored: list) -> dict:
+        """채점된 (answer, score) 목록 중 첫 통과 후보(없으면 최고 점수 후보)를 응답으로 기록"""
+        accepted = next(((a, s) for a, s in scored if s > settings.RECIPE_ACCEPT_SCORE), None)
+        answer, score = accepted or max(scored, key=lambda item: item[1])
+        update = {"answer": answer, "score": score, "attempts": state.get("attempts", 0) + len(scored)}
+        if score > state.get("best_score", -1.0):
+            update.update({"best_answer": answer, "best_score": score})
+        print("best-of-N 후보:", len(scored), "score:", score, "attempts:", update["attempts"], "remaining:", round(remaining_seconds(state), 1))
+        return update
+
+    def generate_candidates(state: RecipeAgentState):
+        # 동기 경로는 후보를 차례로 생성하되, 통과 후보가 나오거나 시간이 부족하면 중단
+        scored = []
+        for temperature in candidate_temperatures(state):
+            answer = generate_chain(temperature).invoke({"query": state["query"], "context": state["context"]}, config=CANDIDATE_CONFIG)
+            score = score_candidate({**state, "answer": answer})
+            scored.append((answer, score))
+            if score > settings.RECIPE_ACCEPT_SCORE or remaining_seconds(state) < settings.RECIPE_STAGE_MIN_REMAINING_SECONDS:
+                break
+        return record_candidates(state, scored)
+
+    async def agenerate_candidates(state: RecipeAgentState):
+        from utils.concurrency import provider_semaphore
+
+        async def run_candidate(temperature):
+            async with provider_semaphore(settings.RECIPE_MODEL_COMPANY_NAME):
+                answer = await generate_chain(temperature).ainvoke({"query": state["query"], "context": state["context"]}, config=CANDIDATE_CONFIG)
+            return answer, await ascore_candidate({**state, "answer": answer})
+
+        temperatures = candidate_temperatures(state)
+        pending = {asyncio.create_task(run_candidate(t)) for t in temperatures}
+        scored = []
+        has_fallback = state.get("best_answer") is not None
+        try:
+            while pending:
+                # 처음부터 마감을 적용. 이전 라운드 최고 후보가 없을 때만(돌려줄 답이 없으므로) 마감 후에도 첫 후보를 기다림
+                timeout = max(remaining_seconds(state), 0.0) if scored or has_fallback else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    print("best-of-N 마감: 남은 후보", len(pending), "취소")
+                    break
+                for task in done:
+                    if task.exception() is not None:
+                        print(f"best-of-N 후보 실패: {task.exception()}")
+                        continue
+                    scored.append(task.result())
+                if any(score > settings.RECIPE_ACCEPT_SCORE for _, score in scored):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+        if not scored:
+            if not has_fallback:
+                raise RuntimeError("best-of-N: 생성에 성공한 후보가 없습니다")
+            # 이번 라운드 후보 없이 마감: 시도 수만 반영하고 after_evaluate → finalize 에서 이전 최고 후보를 응답으로 사용
+            print("best-of-N 이번 라운드 후보 없음: 이전 최고 후보로 종료")
+            return {"attempts": state.get("attempts", 0) + len(temperatures), "answer": state["best_answer"], "score": state.get("best_score", -1.0)}
+        return record_candidates(state, scored)
+
+    if settings.RECIPE_BEST_OF_N > 1:
+        # 후보 채점까지 generate 노드에서 끝나므로 evaluate 노드 없이 바로 통과/재시도 판단
+        graph_builder.add_node('generate', RunnableLambda(generate_candidates, afunc=agenerate_candidates))
+        graph_builder.add_node("finalize", finalize)
+        graph_builder.add_conditional_edges(
+            "generate",
+            after_evaluate,
+            {
+                "retry": "generate",
+                "finalize": "finalize"
+            }
+        )
+    else:
+        graph_builder.add_node('generate', RunnableLambda(generate, afunc=agenerate))
+        graph_builder.add_node("evaluate", RunnableLambda(evaluate, afunc=aevaluate))
+        graph_builder.add_node("finalize", finalize)
+        graph_builder.add_edge("generate", "evaluate")
+        graph_builder.add_conditional_edges(
+            "evaluate",
+            after_evaluate,
+            {
+                "retry": "generate",
+                "finalize": "finalize"
+            }
+        )
+    graph_builder.add_edge("finalize", END)
 
 
     graph = graph_builder.compile()
     return graph
+
+_RECIPE_LLM_FACTORIES = {
+    "recipe_llm": recipe_llm,
+    "recipe_evaluate_llm": recipe_evaluate_llm,
+    "recipe_generate_llm_graph": recipe_graph_llm,
+}
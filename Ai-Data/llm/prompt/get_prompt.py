@@ -1,5 +1,4 @@
 from utils.prompt_loader import load_prompt
-from langchain import hub
 from prompt.constitution_recipe.consitiution_recipe_route_system import route_system_prompt_template
 def get_prompt(prompt_name: str):
     if prompt_name == "constitution_recipe_question":
@@ -12,6 +11,8 @@ def get_prompt(prompt_name: str):
         return load_prompt("constitution_recipe/rewrite_for_web_prompt.json")
     elif prompt_name == "constitution_diagnose_answer":
         return load_prompt("consitituion_diagnose/constitution_diagnose_answer_prompt.json")
+    elif prompt_name == "constitution_diagnose_summary":
+        return load_prompt("consitituion_diagnose/constitution_diagnose_summary_prompt.json")
     elif prompt_name == "constitution_diagnose":
         return load_prompt("consitituion_diagnose/constitution_diagnose_prompt.json")
     elif prompt_name == "constitution_recipe_base":
@@ -27,7 +28,8 @@ def get_prompt(prompt_name: str):
     elif prompt_name == "constitution_recipe_base_ask":
         return load_prompt("constitution_recipe/consitiution_recipe_base_ask_prompt.json")
     elif prompt_name == "doc_relevance":
-        return hub.pull("langchain-ai/rag-document-relevance")
+        # langchain-ai/rag-document-relevance 의 로컬 사본 (hub.pull 네트워크 호출 제거)
+        return load_prompt("constitution_recipe/doc_relevance_prompt.json")
     elif prompt_name == "constitution_recipe_base_generate_best":
         return load_prompt("constitution_recipe/consitiution_recipe_base_generate_best_prompt.json")
     elif prompt_name == "constitution_recipe_auto_generate":
@@ -0,0 +1,19 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from core.config import settings
+
+# async 경로에 남아 있는 동기 작업(파일 I/O, 동기 전용 SDK 등)을 처리하는 고정 크기 스레드 풀
+_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_THREAD_POOL_SIZE,
+    thread_name_prefix="llm-sync",
+)
+
+
+async def run_sync(func, *args, **kwargs):
+    """동기 함수를 전용 스레드 풀에서 실행하고 결과를 기다립니다. (contextvars 유지)"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_executor, call)
@@ -0,0 +1,333 @@
+"""
+레시피 코퍼스 BM25 인덱스
+
+CSV 를 pandas 열 단위로 파싱(ast.literal_eval)해 문서 문자열을 만들고,
+BM25 통계(단어별 posting list 의 문서 번호/빈도, IDF, 문서 길이)를 numpy 배열로 계산해
+.npz 로 저장합니다. 원본 CSV 의 sha256 이 같으면 다시 만들지 않고 바로 읽습니다.
+
+한국어는 어절과 글자 bigram 으로 토큰화하고, 질의의 'X제외' 토큰은 점수에 더하지 않고
+재료 역색인(재료명 → 문서)으로 해당 재료가 들어간 문서를 검색 대상에서 제외합니다.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from utils.recipe_csv import file_sha256, literal_list
+
+INDEX_VERSION = 2
+DEFAULT_CACHE_DIR = "./data/bm25_cache"
+
+_WORD = re.compile(r"[가-힣]+|[A-Za-z]+|\d+")
+_HANGUL = re.compile(r"[가-힣]+")
+_EXCLUDE = re.compile(r"^(.*?)제외")
+_QUOTES = re.compile(r"['\"`]")
+
+# '매운맛제외'처럼 재료가 아닌 제외 표현 → 실제로 걸러낼 재료명
+EXCLUSION_ALIASES: Dict[str, List[str]] = {
+    "매운맛": ["고추", "고춧가루", "고추장", "청양고추", "페퍼론치노", "와사비"],
+    "매운": ["고추", "고춧가루", "고추장", "청양고추", "페퍼론치노", "와사비"],
+    "소고기": ["소고기", "쇠고기", "한우"],
+    "쇠고기": ["소고기", "쇠고기", "한우"],
+    "돼지고기": ["돼지고기", "삼겹살", "목살", "앞다리살", "베이컨", "햄"],
+    "닭고기": ["닭고기", "닭", "닭가슴살", "닭다리"],
+    "해산물": ["새우", "오징어", "조개", "바지락", "홍합", "게", "낙지", "문어", "굴"],
+    "유제품": ["우유", "치즈", "버터", "생크림", "요거트"],
+    "견과류": ["땅콩", "호두", "아몬드", "잣", "캐슈넛"],
+    "계란": ["계란", "달걀"],
+    "달걀": ["계란", "달걀"],
+}
+
+
+def whitespace_tokenize(text: str) -> List[str]:
+    # langchain BM25Retriever 기본 전처리와 동일
+    return text.split()
+
+
+def korean_ngram_tokenize(text: str) -> List[str]:
+    """어절(한글/영문/숫자 덩어리)과 한글 어절의 글자 bigram 을 토큰으로 사용합니다. ('미역국' → 미역국, 미역, 역국)"""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and _HANGUL.fullmatch(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    "whitespace": whitespace_tokenize,
+    "ko_ngram": korean_ngram_tokenize,
+}
+
+
+def _has_final_consonant(char: str) -> bool:
+    return "가" <= char <= "힣" and (ord(char) - ord("가")) % 28 != 0
+
+
+def _conjunct_stem(token: str) -> Optional[str]:
+    """
+    '돼지고기와' / '새우랑' / '두부하고' / '오이,' 처럼 나열 조사나 쉼표로 끝나는 어절이면 조사를 뗀 재료명, 아니면 None
+    (와/랑 은 받침 없는 말, 과/이랑 은 받침 있는 말 뒤에만 오므로 '사과' 같은 재료명을 조사로 오인하지 않음)
+    """
+    token = _QUOTES.sub("", token)
+    if token.endswith(",") and len(token) > 1:
+        return token.rstrip(",")
+    if token.endswith("하고") and len(token) > 2:
+        return token[:-2]
+    for particle, final_consonant in (("이랑", True), ("랑", False), ("과", True), ("와", False)):
+        stem = token[:-len(particle)]
+        if token.endswith(particle) and stem and _has_final_consonant(stem[-1]) == final_consonant:
+            return stem
+    return None
+
+
+def parse_exclusions(query: str) -> Tuple[str, List[str]]:
+    """
+    '미역국 소고기제외 마늘 제외' → ('미역국', ['소고기', '마늘'])
+    '돼지고기와 새우 제외' → ('', ['새우', '돼지고기']), '오이 제외한 샐러드' → ('샐러드', ['오이'])
+    '제외' 가 들어간 어절은 '제외한/제외하고' 같은 어미까지 통째로 질의에서 뺍니다.
+    """
+    tokens = query.split()
+    consumed = set()
+    excluded: List[str] = []
+    for i, token in enumerate(tokens):
+        match = _EXCLUDE.match(token)
+        if match is None:
+            continue
+        consumed.add(i)
+        term = _QUOTES.sub("", match.group(1))
+        k = i - 1
+        if not term and k >= 0 and k not in consumed:
+            # '소고기 제외' : 바로 앞 어절이 제외 대상
+            term = _QUOTES.sub("", tokens[k])
+            consumed.add(k)
+            k -= 1
+        if not term:
+            continue
+        excluded.append(term)
+        # '돼지고기와 새우 제외', '돼지고기, 새우 제외', '돼지고기 및 새우 제외' : 앞쪽 나열 항목도 제외
+        need_member = False
+        while k >= 0 and k not in consumed:
+            stem = _conjunct_stem(tokens[k])
+            if tokens[k] in ("및", ","):
+                need_member = True
+            elif stem is not None:
+                excluded.append(stem)
+                need_member = False
+            elif need_member:
+                excluded.append(_QUOTES.sub("", tokens[k]))
+                need_member = False
+            else:
+                break
+            consumed.add(k)
+            k -= 1
+    positive = " ".join(_QUOTES.sub("", token) for i, token in enumerate(tokens) if i not in consumed)
+    return re.sub(r"\s+", " ", positive).strip(), [term for term in excluded if term]
+
+
+def ingredient_name(ingredient: str) -> str:
+    """'다진 돼지고기 1종이컵' → '다진돼지고기' : 첫 숫자 앞까지, 괄호와 공백 제거"""
+    name = re.split(r"\d", ingredient, maxsplit=1)[0] or ingredient
+    return re.sub(r"\s+|\(.*?\)", "", name)
+
+
+def _ingredient_matches(name: str, term: str) -> bool:
+    # 한 글자 재료(무, 파, 게 ...)는 '단무지' 같은 오탐을 막기 위해 이름 끝에 올 때만 인정
+    if len(term) == 1:
+        return name == term or (name.endswith(term) and len(name) <= 3)
+    return term in name
+
+
+def load_recipe_frame(csv_path: str) -> pd.DataFrame:
+    """제목/재료/조리순서 열을 한 번에 파싱하고 검색용 문서 문자열(content)을 만듭니다."""
+    df = pd.read_csv(csv_path, usecols=lambda column: column in ("제목", "재료", "조리순서", "url"))
+    df = df[df["제목"].notna()].reset_index(drop=True)
+    df["재료"] = df["재료"].map(literal_list)
+    df["조리순서"] = df["조리순서"].map(literal_list)
+    df["content"] = (
+        "제목: " + df["제목"].astype(str)
+        + "\n재료: " + df["재료"].str.join(", ")
+        + "\n조리순서: " + df["조리순서"].str.join(", ")
+    )
+    return df
+
+
+class BM25Index:
+    """posting list(CSR) 형태의 BM25 통계와 문서 본문을 담는 인덱스"""
+
+    def __init__(self, vocab: List[str], term_ptr: np.ndarray, post_docs: np.ndarray, post_tf: np.ndarray,
+                 doc_len: np.ndarray, idf: np.ndarray, contents: List[str], titles: List[str],
+                 ing_names: List[str], ing_ptr: np.ndarray, ing_docs: np.ndarray,
+                 tokenizer_name: str = "ko_ngram", k1: float = 1.5, b: float = 0.75):
+        self.vocab = vocab
+        self.term_id = {term: i for i, term in enumerate(vocab)}
+        self.term_ptr = term_ptr
+        self.post_docs = post_docs
+        self.post_tf = post_tf
+        self.doc_len = doc_len
+        self.idf = idf
+        self.contents = contents
+        self.titles = titles
+        # 재료 역색인: 재료명(정렬) → 해당 재료를 쓰는 문서 번호 (CSR)
+        self.ing_names = ing_names
+        self.ing_ptr = ing_ptr
+        self.ing_docs = ing_docs
+        self.tokenizer_name = tokenizer_name
+        self.tokenizer = TOKENIZERS[tokenizer_name]
+        self._excluded_docs = lru_cache(maxsize=1024)(self._docs_with_ingredient)
+        self.k1 = k1
+        self.b = b
+        avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+        # 문서 길이 정규화 항은 질의와 무관하므로 미리 계산
+        self._norm = (k1 * (1 - b + b * doc_len / avgdl)).astype(np.float32) if avgdl else np.zeros(len(doc_len), dtype=np.float32)
+
+    @classmethod
+    def build(cls, contents: List[str], titles: List[str], ingredients: List[List[str]], tokenizer_name: str = "ko_ngram",
+              k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25) -> "BM25Index":
+        tokenizer = TOKENIZERS[tokenizer_name]
+        term_id: dict = {}
+        doc_ids, term_ids = [], []
+        doc_len = np.zeros(len(contents), dtype=np.int32)
+        for doc_id, content in enumerate(contents):
+            tokens = tokenizer(content)
+            doc_len[doc_id] = len(tokens)
+            for token in tokens:
+                term_ids.append(term_id.setdefault(token, len(term_id)))
+            doc_ids.extend([doc_id] * len(tokens))
+        # (term, doc) 쌍을 한 번에 세어 term 순으로 정렬된 posting list 생성
+        pairs = np.asarray(term_ids, dtype=np.int64) * len(contents) + np.asarray(doc_ids, dtype=np.int64)
+        unique_pairs, tf = np.unique(pairs, return_counts=True)
+        post_terms = (unique_pairs // len(contents)).astype(np.int32)
+        post_docs = (unique_pairs % len(contents)).astype(np.int32)
+        df = np.bincount(post_terms, minlength=len(term_id))
+        term_ptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        # rank_bm25 BM25Okapi 와 같은 IDF (음수 IDF 는 평균의 epsilon 배로 보정)
+        n = len(contents)
+        idf = np.log((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        idf[idf < 0] = epsilon * float(idf.mean()) if len(idf) else 0.0
+        vocab = [None] * len(term_id)
+        for term, i in term_id.items():
+            vocab[i] = term
+        ing_names, ing_ptr, ing_docs = cls._build_ingredient_index(ingredients)
+        return cls(vocab, term_ptr, post_docs, tf.astype(np.int32), doc_len, idf, list(contents), list(titles),
+                   ing_names, ing_ptr, ing_docs, tokenizer_name, k1, b)
+
+    @staticmethod
+    def _build_ingredient_index(ingredients: List[List[str]]):
+        postings: Dict[str, set] = {}
+        for doc_id, items in enumerate(ingredients):
+            for item in items:
+                name = ingredient_name(item)
+                if name:
+                    postings.setdefault(name, set()).add(doc_id)
+        names = sorted(postings)
+        lists = [np.array(sorted(postings[name]), dtype=np.int32) for name in names]
+        ing_ptr = np.concatenate([[0], np.cumsum([len(docs) for docs in lists])]).astype(np.int64)
+        ing_docs = np.concatenate(lists) if lists else np.zeros(0, dtype=np.int32)
+        return names, ing_ptr, ing_docs
+
+    def save(self, path: str, meta: dict):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 압축하지 않은 npz: 로드 시 문자열/숫자 배열을 그대로 읽음 (pickle 미사용)
+        np.savez(
+            path,
+            meta=np.array(json.dumps({**meta, "tokenizer": self.tokenizer_name, "k1": self.k1, "b": self.b}, ensure_ascii=False)),
+            vocab=np.array(self.vocab, dtype=str),
+            term_ptr=self.term_ptr,
+            post_docs=self.post_docs,
+            post_tf=self.post_tf,
+            doc_len=self.doc_len,
+            idf=self.idf,
+            contents=np.array(self.contents, dtype=str),
+            titles=np.array(self.titles, dtype=str),
+            ing_names=np.array(self.ing_names, dtype=str),
+            ing_ptr=self.ing_ptr,
+            ing_docs=self.ing_docs,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(
+                data["vocab"].tolist(), data["term_ptr"], data["post_docs"], data["post_tf"], data["doc_len"], data["idf"],
+                data["contents"].tolist(), data["titles"].tolist(),
+                data["ing_names"].tolist(), data["ing_ptr"], data["ing_docs"],
+                meta["tokenizer"], meta["k1"], meta["b"],
+            )
+
+    @classmethod
+    def from_csv(cls, csv_path: str, cache_dir: str = DEFAULT_CACHE_DIR, tokenizer_name: str = "ko_ngram") -> "BM25Index":
+        """CSV 해시가 같은 캐시 파일이 있으면 읽고, 없으면 새로 만들어 저장합니다."""
+        source_sha256 = file_sha256(csv_path)
+        path = os.path.join(cache_dir, f"bm25_v{INDEX_VERSION}_{tokenizer_name}_{source_sha256[:16]}.npz")
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except Exception as e:
+                print(f"BM25 인덱스 캐시 로드 실패, 다시 생성: {path}: {e}")
+        df = load_recipe_frame(csv_path)
+        index = cls.build(df["content"].tolist(), df["제목"].astype(str).tolist(), df["재료"].tolist(), tokenizer_name)
+        index.save(path, {"version": INDEX_VERSION, "tokenizer": tokenizer_name, "source": os.path.basename(csv_path), "source_sha256": source_sha256})
+        print(f"BM25 인덱스 생성: {path} ({len(index.contents)}건, 어휘 {len(index.vocab)}개)")
+        return index
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.doc_len), dtype=np.float32)
+        for token in self.tokenizer(query):
+            term = self.term_id.get(token)
+            if term is None:
+                continue
+            start, end = self.term_ptr[term], self.term_ptr[term + 1]
+            docs = self.post_docs[start:end]
+            tf = self.post_tf[start:end]
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + self._norm[docs])
+        return scores
+
+    def _docs_with_ingredient(self, term: str) -> np.ndarray:
+        """제외어에 해당하는 재료를 쓰는 문서 번호 (별칭 확장 포함)"""
+        terms = EXCLUSION_ALIASES.get(term, [term])
+        lists = [
+            self.ing_docs[self.ing_ptr[i]:self.ing_ptr[i + 1]]
+            for i, name in enumerate(self.ing_names)
+            if any(_ingredient_matches(name, t) for t in terms)
+        ]
+        return np.unique(np.concatenate(lists)) if lists else np.zeros(0, dtype=np.int32)
+
+    def excluded_mask(self, excluded: List[str]) -> np.ndarray:
+        mask = np.zeros(len(self.doc_len), dtype=bool)
+        for term in excluded:
+            mask[self._excluded_docs(term)] = True
+        return mask
+
+    def search(self, query: str, k: int) -> List[Document]:
+        positive, excluded = parse_exclusions(query)
+        scores = self.scores(positive)
+        # 제외 재료가 들어간 문서는 점수와 무관하게 후보에서 제거
+        allowed = np.flatnonzero(~self.excluded_mask(excluded)) if excluded else np.arange(len(scores))
+        k = min(k, len(allowed))
+        if k <= 0:
+            return []
+        candidate_scores = scores[allowed]
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = allowed[top[np.argsort(-candidate_scores[top], kind="stable")]]
+        return [Document(page_content=self.contents[i], metadata={"name": self.titles[i], "score": float(scores[i])}) for i in top]
+
+
+class BM25RecipeRetriever(BaseRetriever):
+    """BM25Index 를 langchain retriever 로 감싼 것"""
+
+    index: BM25Index
+    k: int = 5
+
+    @classmethod
+    def from_csv(cls, csv_path: str, k: int = 5, cache_dir: Optional[str] = None) -> "BM25RecipeRetriever":
+        return cls(index=BM25Index.from_csv(csv_path, cache_dir or DEFAULT_CACHE_DIR), k=k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.index.search(query, self.k)
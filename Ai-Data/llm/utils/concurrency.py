@@ -0,0 +1,16 @@
+import asyncio
+from typing import Dict
+from core.config import settings
+
+# provider별 동시 LLM 호출 수 제한 (rate limit 보호)
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """provider에 해당하는 세마포어를 반환합니다. 한도는 LLM_PROVIDER_CONCURRENCY 설정을 따릅니다."""
+    semaphore = _provider_semaphores.get(provider)
+    if semaphore is None:
+        limit = settings.LLM_PROVIDER_CONCURRENCY.get(provider, settings.LLM_DEFAULT_CONCURRENCY)
+        semaphore = asyncio.Semaphore(max(limit, 1))
+        _provider_semaphores[provider] = semaphore
+    return semaphore
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from core.config import settings
+from db.mongo import get_collection
+
+
+class DiagnosisSession(BaseModel):
+    session_id: str
+    summary: str = ""                                           # 압축된 이전 문진 요약
+    recent: List[Dict[str, str]] = Field(default_factory=list)  # 요약되지 않은 최근 Q/A
+    count: int = 0                                              # 지금까지 받은 전체 답변 수
+    updated_at: float = Field(default_factory=time.time)
+
+
+class DiagnosisSessionStore:
+    """
+    진단 세션 상태 저장소: 프로세스 내 TTL/LRU 캐시, persist=True 이면 MongoDB(diagnosis_sessions)에도 저장합니다.
+    캐시에 없는 세션은 Mongo 에서 읽어 오며, 둘 다 없으면 None (호출자가 전체 답변으로 다시 시작).
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, persist: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.persist = persist
+        self._cache: "OrderedDict[str, DiagnosisSession]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _sessions_col(self):
+        return get_collection("diagnosis_sessions")
+
+    def _expired(self, session: DiagnosisSession) -> bool:
+        return time.time() - session.updated_at > self.ttl_seconds
+
+    def lock(self, session_id: str) -> asyncio.Lock:
+        """같은 세션의 요청/요약 압축이 동시에 상태를 바꾸지 않도록 세션별 잠금"""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    def _drop_lock(self, session_id: str):
+        # 사용 중이 아닌 잠금만 제거 (대기 중인 요청이 있으면 그대로 둠)
+        lock = self._locks.get(session_id)
+        if lock is not None and not lock.locked():
+            del self._locks[session_id]
+
+    def _cache_put(self, session: DiagnosisSession):
+        self._cache[session.session_id] = session
+        self._cache.move_to_end(session.session_id)
+        while len(self._cache) > self.max_entries:
+            evicted, _ = self._cache.popitem(last=False)
+            self._drop_lock(evicted)
+
+    async def get(self, session_id: str) -> Optional[DiagnosisSession]:
+        session = self._cache.get(session_id)
+        if session is None and self.persist:
+            try:
+                document = await self._sessions_col().find_one({"_id": session_id})
+            except Exception as e:
+                print(f"[{datetime.now()}] 진단 세션 조회 실패: session_id={session_id}, error={e}")
+                document = None
+            if document is not None:
+                document.pop("_id", None)
+                document.pop("saved_at", None)
+                session = DiagnosisSession(**document)
+        if session is None or self._expired(session):
+            self._cache.pop(session_id, None)
+            self._drop_lock(session_id)
+            return None
+        self._cache_put(session)
+        return session
+
+    async def save(self, session: DiagnosisSession):
+        session.updated_at = time.time()
+        self._cache_put(session)
+        if self.persist:
+            try:
+                document = {**session.dict(), "saved_at": datetime.utcnow()}
+                await self._sessions_col().replace_one({"_id": session.session_id}, document, upsert=True)
+            except Exception as e:
+                # 저장 실패 시에도 캐시로는 계속 진행 (다른 워커에서는 409 → 전체 답변 재전송으로 복구)
+                print(f"[{datetime.now()}] 진단 세션 저장 실패: session_id={session.session_id}, error={e}")
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._cache),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persist": self.persist,
+        }
+
+
+diagnosis_sessions = DiagnosisSessionStore(
+    ttl_seconds=settings.DIAGNOSE_SESSION_TTL_SECONDS,
+    max_entries=settings.DIAGNOSE_SESSION_MAX_ENTRIES,
+    persist=settings.DIAGNOSE_SESSION_PERSIST,
+)
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.async_pool import run_sync
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    질의 임베딩 캐시: 메모리 LRU → SQLite → 원본 임베딩 모델 순으로 조회합니다.
+    키는 sha256(모델명 + 정규화된 텍스트)이며, 동시에 들어온 미스는 한 번의 embed_documents 호출로 묶습니다.
+    문서 임베딩(embed_documents)은 캐시하지 않고 그대로 전달합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, db_path: Optional[str] = None, max_entries: int = 2048, batch_window_ms: int = 10):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.batch_window = batch_window_ms / 1000
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            # 여러 uvicorn 워커가 같은 파일을 공유하므로 WAL 모드 사용
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+        # 대기 중인 미스: 키 → (텍스트, future). 같은 키는 하나의 future 를 공유
+        self._pending: Dict[str, tuple] = {}
+        self._flush_tasks: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key: str, vector: List[float]):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _disk_put(self, items: Dict[str, List[float]]):
+        if self._db is None or not items:
+            return
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        vector = self._memory_get(key)
+        if vector is None:
+            vector = self._disk_get(key)
+            if vector is not None:
+                self._memory_put(key, vector)
+        if vector is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return vector
+
+    def _store(self, items: Dict[str, List[float]]):
+        for key, vector in items.items():
+            self._memory_put(key, vector)
+        self._disk_put(items)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalize_text(text))
+            self._store({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self._memory_get(key)
+        if vector is not None:
+            self.hits += 1
+            return vector
+        vector = await run_sync(self._lookup, key)
+        if vector is not None:
+            return vector
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = (normalize_text(text), asyncio.get_running_loop().create_future())
+            self._pending[key] = pending
+            if len(self._pending) == 1:
+                # 새 배치의 첫 미스가 flush 를 예약
+                task = asyncio.create_task(self._flush())
+                self._flush_tasks.add(task)
+                task.add_done_callback(self._flush_tasks.discard)
+        return await asyncio.shield(pending[1])
+
+    async def _flush(self):
+        # 짧은 대기 후 그동안 모인 미스를 한 번의 요청으로 임베딩
+        await asyncio.sleep(self.batch_window)
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        keys = list(batch)
+        try:
+            vectors = await self.embeddings.aembed_documents([batch[key][0] for key in keys])
+        except Exception as e:
+            for key in keys:
+                if not batch[key][1].done():
+                    batch[key][1].set_exception(e)
+            return
+        items = dict(zip(keys, vectors))
+        for key in keys:
+            if not batch[key][1].done():
+                batch[key][1].set_result(items[key])
+        try:
+            await run_sync(self._store, items)
+        except Exception as e:
+            print(f"임베딩 캐시 저장 실패: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_size": len(self._memory),
+            "max_entries": self.max_entries,
+        }
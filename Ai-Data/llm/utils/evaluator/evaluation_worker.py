@@ -0,0 +1,89 @@
+import asyncio
+import random
+import traceback
+from datetime import datetime
+from typing import Dict, List, Optional
+from core.config import settings
+from db.mongo import get_collection
+from utils.evaluator.recipe_evaluator import aevaluate_qa, aevaluate_recipe
+
+# 채팅 응답 경로 밖에서 레시피 품질 평가를 수행하는 프로세스 내 대기열 (워커를 띄울 때 실행 중인 이벤트 루프에서 생성)
+_evaluation_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+
+
+def _evaluations_col():
+    return get_collection("recipe_evaluations")
+
+
+def submit_evaluation(session_id: Optional[str], messages: List[Dict[str, str]], recipe: str, constitution: Optional[str] = None) -> bool:
+    """레시피 평가 작업을 대기열에 넣습니다. 워커가 없거나, 샘플링에서 빠지거나, 대기열이 가득 차면 False를 반환합니다."""
+    if _evaluation_queue is None:
+        return False
+    if random.random() >= settings.RECIPE_EVALUATION_SAMPLE_RATE:
+        return False
+    job = {
+        "session_id": session_id,
+        "messages": list(messages),
+        "recipe": recipe,
+        "constitution": constitution,
+        "requested_at": datetime.utcnow(),
+    }
+    try:
+        _evaluation_queue.put_nowait(job)
+    except asyncio.QueueFull:
+        print(f"[{datetime.now()}] 평가 대기열이 가득 차 평가를 건너뜀: session_id={session_id}")
+        return False
+    return True
+
+
+async def _evaluate_job(job: dict):
+    (qa_result, qa_score), (recipe_result, recipe_score) = await asyncio.gather(
+        aevaluate_qa(job["messages"]),
+        aevaluate_recipe(job["messages"], job["recipe"], job["constitution"]),
+    )
+    document = {
+        **job,
+        "qa_result": qa_result,
+        "qa_score": qa_score,
+        "recipe_result": recipe_result,
+        "recipe_score": recipe_score,
+        "evaluated_at": datetime.utcnow(),
+    }
+    await _evaluations_col().insert_one(document)
+    print(f"[{datetime.now()}] 백그라운드 평가 완료: session_id={job['session_id']}, qa_score={qa_score}, recipe_score={recipe_score}")
+
+
+async def _evaluation_worker(queue: asyncio.Queue):
+    while True:
+        job = await queue.get()
+        try:
+            await _evaluate_job(job)
+        except Exception as e:
+            print(f"[{datetime.now()}] 백그라운드 평가 실패: {e}")
+            traceback.print_exc()
+        finally:
+            queue.task_done()
+
+
+def start_evaluation_workers():
+    """FastAPI 시작 시 대기열을 만들고 평가 워커를 띄웁니다."""
+    global _evaluation_queue
+    _evaluation_queue = asyncio.Queue(maxsize=settings.RECIPE_EVALUATION_QUEUE_SIZE)
+    for _ in range(max(settings.RECIPE_EVALUATION_WORKERS, 1)):
+        _workers.append(asyncio.create_task(_evaluation_worker(_evaluation_queue)))
+
+
+async def stop_evaluation_workers():
+    global _evaluation_queue
+    _evaluation_queue = None
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+async def get_session_evaluations(session_id: str) -> List[dict]:
+    """세션별로 저장된 평가 결과를 반환합니다."""
+    cursor = _evaluations_col().find({"session_id": session_id}, {"_id": 0}).sort("evaluated_at", 1)
+    return await cursor.to_list(length=None)
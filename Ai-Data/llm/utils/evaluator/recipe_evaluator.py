@@ -1,27 +1,42 @@
 import os
-from typing import Dict, List
-import pathlib
+import json
+from typing import Dict, List, Optional
 from utils.prompt_loader import load_prompt
 from core.config import settings
 from model.recipe_model import get_recipe_llm
 from prompt.get_prompt import get_prompt
-from core.config import settings
+from utils.seoupseng_table import get_seoupseng_table, extract_ingredients
 
-def evaluate_qa(history: List[Dict]) -> Dict:
-    '''
-    주어진 대화를 LLM으로 평가하고 JSON으로 결과를 반환합니다.
-    '''
+def _qa_prompt(history: List[Dict]) -> str:
     qa_evaluateprompt_template = get_prompt(settings.RECIPE_EVALUATE_QA_PROMPT_NAME)
-    prompt = qa_evaluateprompt_template.format(qa_list=history)
-    recipe_evaluate_llm = get_recipe_llm(settings.RECIPE_EVALUATE_LLM_NAME)
-    response = recipe_evaluate_llm.invoke([{'role': 'user', 'content': prompt}])
-    
-  
-    content = response.content
+    return qa_evaluateprompt_template.format(qa_list=history)
+
+
+def _constitution_table(recipe, constitution: Optional[str] = None) -> str:
+    # 섭생표 전체 대신 레시피 재료와 사용자 체질에 해당하는 행/열만 프롬프트에 포함
+    table = get_seoupseng_table()
+    ingredients = extract_ingredients(recipe)
+    if not ingredients:
+        # 재료를 읽을 수 없는 레시피는 기존처럼 전체 표를 사용
+        return table.render(list(range(len(table.rows))), constitution)
+    return table.render(table.match_rows(ingredients), constitution)
+
+
+def _recipe_prompt(history: List[Dict], recipe: str, constitution: Optional[str] = None) -> str:
+    recipe_evaluate_template = get_prompt(settings.RECIPE_EVALUATE_RECIPE_PROMPT_NAME)
+    constitution_table = _constitution_table(recipe, constitution)
+    return recipe_evaluate_template.format(dialogue=history,recipe_json=recipe,constitution_table=constitution_table)
+
+
+def _metering_config(node: str) -> dict:
+    # 그래프 밖(백그라운드 워커, /test)에서 호출될 때 사용량을 평가 종류별로 구분
+    return {"metadata": {"metering_node": node}}
+
+
+def _parse_evaluation(content: str):
     print(content)
     # JSON 파싱
     try:
-        import json
         result = json.loads(content)
         score = evaluate_metric(result)
     except Exception as e:
@@ -29,30 +44,46 @@ def evaluate_qa(history: List[Dict]) -> Dict:
     return result, score
 
 
-def evaluate_recipe(history:List[Dict], recipe: str) -> Dict:
+def evaluate_qa(history: List[Dict]) -> Dict:
+    '''
+    주어진 대화를 LLM으로 평가하고 JSON으로 결과를 반환합니다.
+    '''
+    prompt = _qa_prompt(history)
+    recipe_evaluate_llm = get_recipe_llm(settings.RECIPE_EVALUATE_LLM_NAME)
+    response = recipe_evaluate_llm.invoke([{'role': 'user', 'content': prompt}], config=_metering_config("evaluate_qa"))
+    return _parse_evaluation(response.content)
+
+
+def evaluate_recipe(history:List[Dict], recipe: str, constitution: Optional[str] = None) -> Dict:
     '''
     주어진 레시피를 LLM으로 평가하고 JSON으로 결과를 반환합니다.
+    constitution이 주어지면 섭생표에서 해당 체질 열만 사용합니다.
     '''
+    prompt = _recipe_prompt(history, recipe, constitution)
+    recipe_evaluate_llm = get_recipe_llm(settings.RECIPE_EVALUATE_LLM_NAME)
+    response = recipe_evaluate_llm.invoke([{'role': 'user', 'content': prompt}], config=_metering_config("evaluate_recipe"))
+    return _parse_evaluation(response.content)
 
-    recipe_evaluate_template = get_prompt(settings.RECIPE_EVALUATE_RECIPE_PROMPT_NAME)
-    csv_path = pathlib.Path(settings.SEOUPSENG_CSV_PATH)
-    constitution_table = csv_path.read_text(encoding="utf-8")
 
-    prompt = recipe_evaluate_template.format(dialogue=history,recipe_json=recipe,constitution_table=constitution_table)
+async def aevaluate_qa(history: List[Dict]) -> Dict:
+    '''
+    evaluate_qa 의 async 버전 (이벤트 루프를 막지 않음)
+    '''
+    prompt = _qa_prompt(history)
     recipe_evaluate_llm = get_recipe_llm(settings.RECIPE_EVALUATE_LLM_NAME)
-    response = recipe_evaluate_llm.invoke([{'role': 'user', 'content': prompt}])
-    
-  
-    content = response.content
-    print(content)
-    # JSON 파싱
-    try:
-        import json
-        result = json.loads(content)
-        score = evaluate_metric(result)
-    except Exception as e:
-        raise ValueError(f'JSON 파싱 실패: {e} 응답 내용: {content}')
-    return result, score
+    response = await recipe_evaluate_llm.ainvoke([{'role': 'user', 'content': prompt}], config=_metering_config("evaluate_qa"))
+    return _parse_evaluation(response.content)
+
+
+async def aevaluate_recipe(history: List[Dict], recipe: str, constitution: Optional[str] = None) -> Dict:
+    '''
+    evaluate_recipe 의 async 버전
+    '''
+    prompt = _recipe_prompt(history, recipe, constitution)
+    recipe_evaluate_llm = get_recipe_llm(settings.RECIPE_EVALUATE_LLM_NAME)
+    response = await recipe_evaluate_llm.ainvoke([{'role': 'user', 'content': prompt}], config=_metering_config("evaluate_recipe"))
+    return _parse_evaluation(response.content)
+
 
 def evaluate_metric(evaluate_json):
     count = 0
@@ -60,4 +91,4 @@ def evaluate_metric(evaluate_json):
         if qa['answer'] == '예':
             count += 1
     return count / len(evaluate_json)
-    
\ No newline at end of file
+
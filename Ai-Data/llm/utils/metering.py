@@ -0,0 +1,188 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# 모델별 가격 정보 (1M 토큰당 USD)
+MODEL_PRICING = {
+    # OpenAI 모델
+    "gpt-4.1-2025-04-14": {"input": 2.00, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "output": 1.60},
+    "gpt-4.1-nano-2025-04-14": {"input": 0.10, "output": 0.40},
+    "gpt-4.1-nano": {"input": 0.10, "output": 0.40},
+    "gpt-4o-mini-2024-07-18": {"input": 0.40, "output": 1.60},
+    "gpt-4o": {"input": 5.00, "output": 15.00},
+    "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
+
+    # Gemini 모델
+    "gemini-2.5-flash-preview-04-17": {"input": 0.15, "output": 0.60},
+    "gemini-2.5-pro-preview-03-25": {"input": 1.25, "output": 10.00},
+    "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
+    "gemini-pro": {"input": 0.25, "output": 0.75},
+
+    # Anthropic 모델
+    "claude-3-7-sonnet-20250219": {"input": 3.00, "output": 15.00},
+    "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.00},
+    "claude-2": {"input": 8.00, "output": 24.00}
+}
+
+
+def model_pricing(model: Optional[str]) -> Optional[Dict[str, float]]:
+    """모델 가격을 찾습니다. 'gpt-4.1-mini-2025-04-14'처럼 날짜가 붙은 이름은 가장 긴 접두 모델명으로 찾습니다."""
+    if not model:
+        return None
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    prefixes = [name for name in MODEL_PRICING if model.startswith(name)]
+    return MODEL_PRICING[max(prefixes, key=len)] if prefixes else None
+
+
+def token_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    pricing = model_pricing(model)
+    if pricing is None:
+        return 0.0
+    # 1M 토큰당 가격을 실제 토큰 수에 맞게 변환
+    return (input_tokens * pricing["input"] / 1000000) + (output_tokens * pricing["output"] / 1000000)
+
+
+# 토큰 사용량 및 비용 계산 함수
+def calculate_tokens_and_cost(provider: str, model: str, response):
+    tokens = {"input": 0, "output": 0}
+
+    # 프로바이더 및 모델별 토큰 정보 추출
+    try:
+        if provider == "openai":
+            tokens["input"] = response.response_metadata["token_usage"]["prompt_tokens"]
+            tokens["output"] = response.response_metadata["token_usage"]["completion_tokens"]
+        elif provider == "gemini":
+            tokens["input"] = response.usage_metadata["input_tokens"]
+            tokens["output"] = response.usage_metadata["output_tokens"]
+        elif provider == "claude":
+            tokens["input"] = response.response_metadata["usage"]["input_tokens"]
+            tokens["output"] = response.response_metadata["usage"]["output_tokens"]
+    except Exception as e:
+        print(f"토큰 정보 추출 오류: {e}")
+        return 0, 0, 0.0
+
+    # 비용 계산
+    if model_pricing(model) is None:
+        print(f"가격 정보가 없는 모델: {model}")
+    cost = token_cost(model, tokens["input"], tokens["output"])
+
+    return tokens["input"], tokens["output"], cost
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0, "llm_ms": 0}
+
+
+class UsageMeter:
+    """LLM 호출의 토큰/비용/소요 시간을 노드별, 모델별로 누적합니다."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = _empty_bucket()
+        self.by_node: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: str, model: str, input_tokens: int, output_tokens: int, cost: float, llm_ms: int):
+        with self._lock:
+            for bucket in (self.total, self.by_node.setdefault(node, _empty_bucket()), self.by_model.setdefault(model, _empty_bucket())):
+                bucket["calls"] += 1
+                bucket["input_tokens"] += input_tokens
+                bucket["output_tokens"] += output_tokens
+                bucket["cost"] += cost
+                bucket["llm_ms"] += llm_ms
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.total,
+                "wall_ms": int((time.perf_counter() - self.started) * 1000),
+                "by_node": {name: dict(bucket) for name, bucket in self.by_node.items()},
+                "by_model": {name: dict(bucket) for name, bucket in self.by_model.items()},
+            }
+
+
+# 프로세스 전체 누적치 (메트릭 엔드포인트용)와 요청 단위 누적치
+process_meter = UsageMeter()
+_request_meter: ContextVar[Optional[UsageMeter]] = ContextVar("request_meter", default=None)
+
+
+@contextmanager
+def request_meter():
+    """with 블록 안에서 호출된 LLM 사용량을 요청 단위로 모읍니다."""
+    meter = UsageMeter()
+    token = _request_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _request_meter.reset(token)
+
+
+def _usage_from_result(response: LLMResult) -> Tuple[int, int]:
+    # chat 모델은 message.usage_metadata 에, 그 외에는 llm_output 에 토큰 수가 들어 있음
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    llm_output = response.llm_output or {}
+    usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+    return (
+        usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0,
+        usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0,
+    )
+
+
+class MeteringCallbackHandler(BaseCallbackHandler):
+    """
+    get_llm / get_recipe_llm 으로 만든 모든 클라이언트에 붙는 콜백.
+    그래프 노드 이름(metadata의 langgraph_node)과 모델별로 사용량을 기록합니다.
+    """
+
+    # executor 로 넘기지 않고 호출한 컨텍스트에서 실행해야 요청 단위 ContextVar 를 볼 수 있음
+    run_inline = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[float, str, str, Optional[UsageMeter]]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, serialized: Optional[Dict[str, Any]], metadata: Optional[Dict[str, Any]], kwargs: Dict[str, Any]):
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        node = metadata.get("langgraph_node") or metadata.get("metering_node") or "direct"
+        model = metadata.get("ls_model_name") or params.get("model_name") or params.get("model") or (serialized or {}).get("name", "unknown")
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), node, model, _request_meter.get())
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, serialized, metadata, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, serialized, metadata, kwargs)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        started, node, model, meter = run
+        llm_ms = int((time.perf_counter() - started) * 1000)
+        input_tokens, output_tokens = _usage_from_result(response)
+        cost = token_cost(model, input_tokens, output_tokens)
+        process_meter.record(node, model, input_tokens, output_tokens, cost, llm_ms)
+        if meter is not None:
+            meter.record(node, model, input_tokens, output_tokens, cost, llm_ms)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+metering_handler = MeteringCallbackHandler()
@@ -0,0 +1,66 @@
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+
+class OpeningQuestionPool:
+    """
+    새 진단 세션의 첫 질문(빈 대화 기록으로 생성) 풀.
+    첫 질문은 세션마다 같은 분포에서 나오므로 미리 여러 개 생성해 두고 무작위로 꺼내 LLM 지연 없이 응답합니다.
+    백그라운드 태스크가 주기적으로 풀을 새로 생성합니다.
+    """
+
+    def __init__(self, generate: Callable[[], Awaitable[str]], size: int, refresh_seconds: float):
+        self.generate = generate
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self.questions: List[str] = []
+        self.refreshed_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        results = await asyncio.gather(*(self.generate() for _ in range(self.size)), return_exceptions=True)
+        questions = list(dict.fromkeys(q.strip() for q in results if isinstance(q, str) and q.strip()))
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            print(f"[{datetime.now()}] 첫 질문 풀 생성 실패 {len(failures)}건: {failures[0]}")
+        if questions:
+            # 모두 실패한 경우에는 기존 풀을 유지
+            self.questions = questions
+            self.refreshed_at = time.time()
+            print(f"[{datetime.now()}] 첫 질문 풀 갱신: {len(questions)}개")
+
+    def take(self) -> Optional[str]:
+        """풀에서 질문 하나를 꺼냅니다. 풀이 비어 있으면 None (호출자가 직접 생성)"""
+        if not self.questions:
+            return None
+        return random.choice(self.questions)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[{datetime.now()}] 첫 질문 풀 갱신 실패: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        """FastAPI 시작 시 주기적 갱신 태스크를 띄웁니다. size 가 0 이면 사용하지 않습니다."""
+        if self.size > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.questions),
+            "refreshed_at": self.refreshed_at,
+            "refresh_seconds": self.refresh_seconds,
+        }
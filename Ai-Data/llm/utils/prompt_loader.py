@@ -1,26 +1,61 @@
 import os
+import json
+import threading
 from pathlib import Path
 from langchain.prompts import PromptTemplate
 
+# llm 디렉토리 내 prompt 폴더
+PROMPT_BASE_PATH = Path(__file__).resolve().parent.parent / "prompt"
 
-def load_prompt(filename: str) -> PromptTemplate:
-    """
-    지정된 filename (.md) 프롬프트 파일을 읽어 PromptTemplate으로 반환합니다.
-    파일 경로: <project_root>/Ai-Data/llm/utils/prompt/{filename}
-    """
-    # llm 디렉토리 내 prompt 폴더 참조
-    base_path = Path(__file__).resolve().parent.parent / "prompt"
-    file_path = base_path / filename
-    if not file_path.exists():
-        raise FileNotFoundError(f"Prompt file not found: {file_path}")
+# 컴파일된 프롬프트 캐시: filename -> ((mtime_ns, size), prompt)
+_prompt_cache: dict = {}
+_prompt_cache_lock = threading.Lock()
+
+
+def _build_prompt(file_path: Path):
     text = file_path.read_text(encoding="utf-8")
     # JSON 템플릿 지원
     if file_path.suffix.lower() == ".json":
-        import json
         data = json.loads(text)
         # 첫 번째 키 사용
         key = next(iter(data))
         tpl = data[key]
+        # messages + schema 형식은 구조화 출력 프롬프트 (hub 프롬프트 로컬 사본)
+        if "messages" in tpl:
+            from langchain_core.prompts.structured import StructuredPrompt
+            return StructuredPrompt.from_messages_and_schema(
+                [tuple(m) for m in tpl["messages"]], tpl["schema"]
+            )
         return PromptTemplate(template=tpl["template"], input_variables=tpl.get("input_variables", []))
     # MD 템플릿 지원
-    return PromptTemplate.from_template(text) 
\ No newline at end of file
+    return PromptTemplate.from_template(text)
+
+
+def load_prompt(filename: str) -> PromptTemplate:
+    """
+    지정된 filename (.json/.md) 프롬프트 파일을 읽어 PromptTemplate으로 반환합니다.
+    파일 경로: <project_root>/Ai-Data/llm/prompt/{filename}
+    파일의 mtime/크기가 바뀌지 않았다면 캐시된 템플릿을 그대로 반환합니다.
+    """
+    file_path = PROMPT_BASE_PATH / filename
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt file not found: {file_path}")
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _prompt_cache.get(filename)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    prompt = _build_prompt(file_path)
+    with _prompt_cache_lock:
+        _prompt_cache[filename] = (version, prompt)
+    return prompt
+
+
+def invalidate_prompt(filename: str = None):
+    """프롬프트 캐시를 무효화합니다. filename이 없으면 전체를 비웁니다."""
+    with _prompt_cache_lock:
+        if filename is None:
+            _prompt_cache.clear()
+        else:
+            _prompt_cache.pop(filename, None)
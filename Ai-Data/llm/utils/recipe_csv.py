@@ -0,0 +1,23 @@
+import ast
+import hashlib
+from typing import List
+
+
+def file_sha256(path: str) -> str:
+    """인덱스 캐시가 원본 파일과 같은지 확인하기 위한 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def literal_list(value) -> List[str]:
+    # 레시피 CSV 에는 "['재료 1', '재료 2']" 형태의 파이썬 리스트 문자열로 저장되어 있음
+    if not isinstance(value, str) or not value:
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return []
+    return [str(item) for item in parsed] if isinstance(parsed, (list, tuple)) else []
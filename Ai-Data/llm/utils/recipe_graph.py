@@ -1,20 +1,18 @@
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import AnyMessage, HumanMessage, AIMessage
 
 from langchain_community.tools import DuckDuckGoSearchRun # duckduckgosearchrun 은 무료!!!
 
 from langchain_chroma import Chroma
-from langchain.retrievers import BM25Retriever
 
 from langgraph.graph import StateGraph, START, END
 
-from langchain import hub
+from utils.prompt_loader import load_prompt
+from utils.bm25_index import BM25RecipeRetriever
 
-import pandas as pd
 from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
 from typing import Literal
@@ -34,32 +32,8 @@ embedding_func = OpenAIEmbeddings(model="text-embedding-3-large")
 
 # vector_store
 def make_bm25_retriever(csv_file_path):
-    df = pd.read_csv(csv_file_path)
-
-    documents = []
-    for _, row in df.iterrows():
-        try:
-            ingredients = eval(row["재료"])
-            steps = eval(row["조리순서"])
-        except Exception:
-            ingredients = []
-            steps = []
-
-        content = (
-            f"제목: {row['제목']}\n"
-            f"재료: {', '.join(ingredients)}\n"
-            f"조리순서: {', '.join(steps)}"
-        )
-
-        documents.append(Document(
-            page_content=content,
-            metadata={
-                "name": row["제목"]
-            }
-        ))
-    retriever = BM25Retriever.from_documents(documents)
-    retriever.k = 5  # top-k 개수 설정
-    return retriever
+    # CSV 해시가 같으면 저장된 BM25 통계(.npz)를 바로 읽고, 바뀌었을 때만 다시 만듦
+    return BM25RecipeRetriever.from_csv(csv_file_path, k=5)  # top-k 개수 설정
 
 retriever = make_bm25_retriever("./recipe.csv")
 # vector_store = Chroma(
@@ -130,7 +104,7 @@ def retrieve(state: RecipeAgentState):
     return {"context": docs}
 
 
-doc_relevance_prompt = hub.pull("langchain-ai/rag-document-relevance")
+doc_relevance_prompt = load_prompt("constitution_recipe/doc_relevance_prompt.json")
 
 
 def check_recipe_relevance(state: RecipeAgentState):
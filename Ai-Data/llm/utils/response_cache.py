@@ -0,0 +1,161 @@
+import re
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.config import settings
+from utils.retriever import recipe_embedding
+from utils.slot_router import route_by_slots, user_profile
+
+
+def normalize_context(constitution: Optional[str], allergies: Optional[List[str]], dietary_restrictions: Optional[List[str]],
+                      health_conditions: Optional[str] = None) -> Tuple:
+    """체질/알레르기/식이 제한/건강 상태를 순서·공백·대소문자에 무관한 캐시 키로 정규화합니다."""
+    def _norm(value: str) -> str:
+        return re.sub(r"\s+", "", value or "").lower()
+    return (
+        _norm(constitution).replace("체질", ""),
+        tuple(sorted({_norm(a) for a in allergies or [] if _norm(a)})),
+        tuple(sorted({_norm(d) for d in dietary_restrictions or [] if _norm(d)})),
+        _norm(health_conditions),
+    )
+
+
+def normalize_query(messages: List[Dict[str, str]]) -> str:
+    """대화 중 사용자 발화만 모아 공백을 정리한 질의 문자열을 만듭니다. (LLM 호출 없이 요약 질의를 대신함)"""
+    user_turns = [m.get("content", "") for m in messages if m.get("role") == "user"]
+    return re.sub(r"\s+", " ", " / ".join(user_turns)).strip()
+
+
+class SemanticResponseCache:
+    """
+    사용자 컨텍스트(체질, 알레르기, 식이 제한, 건강 상태)가 같고 질의 임베딩이 충분히 가까우면
+    이미 생성·평가된 레시피 응답을 그대로 돌려주는 캐시 (TTL + LRU)
+    질의 문자열이 완전히 같으면 임베딩 없이 바로 적중시키고, 같은 컨텍스트의 항목이 없으면 임베딩 없이 미스로 처리합니다.
+    """
+
+    def __init__(self, embeddings, threshold: float, ttl_seconds: int, max_entries: int):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._exact: Dict[Tuple, str] = {}  # (컨텍스트, 질의) → 항목 id
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key)
+        exact_key = (entry["context"], entry["query"])
+        if self._exact.get(exact_key) == key:
+            del self._exact[exact_key]
+        self.evictions += 1
+
+    def _purge_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for key in expired:
+            self._evict(key)
+
+    def _hit(self, key: str) -> dict:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._entries[key]["response"]
+
+    def _match_exact(self, context: Tuple, query: str) -> Tuple[Optional[dict], bool]:
+        """(질의가 완전히 같은 항목의 응답 또는 None, 같은 컨텍스트 항목 존재 여부)"""
+        with self._lock:
+            self._purge_expired(time.time())
+            key = self._exact.get((context, query))
+            if key is not None:
+                return self._hit(key), True
+            has_context = any(entry["context"] == context for entry in self._entries.values())
+            if not has_context:
+                self.misses += 1
+            return None, has_context
+
+    def _match(self, context: Tuple, vector: np.ndarray) -> Optional[dict]:
+        with self._lock:
+            candidates = [(key, entry) for key, entry in self._entries.items() if entry["context"] == context]
+            if candidates:
+                # 같은 컨텍스트의 캐시 항목과 한 번에 코사인 유사도 계산
+                similarities = np.stack([entry["vector"] for _, entry in candidates]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    return self._hit(candidates[best][0])
+            self.misses += 1
+            return None
+
+    def _insert(self, context: Tuple, query: str, vector: np.ndarray, response: dict):
+        with self._lock:
+            key = response["cache_id"]
+            self._entries[key] = {
+                "context": context,
+                "query": query,
+                "vector": vector,
+                "response": response,
+                "created_at": time.time(),
+            }
+            self._exact[(context, query)] = key
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    async def alookup(self, request) -> Tuple[Optional[dict], Optional[Tuple]]:
+        """
+        캐시를 조회합니다. (캐시된 응답 또는 None, 저장 시 재사용할 캐시 키)를 반환합니다.
+        캐시 키는 (컨텍스트, 질의, 임베딩 또는 None) 이며, 조회 때 임베딩을 계산했다면 astore 에서 재사용합니다.
+        """
+        query = normalize_query(request.messages)
+        if not query:
+            return None, None
+        # 아직 질문 단계인 대화는 레시피 응답이 아니므로 캐시 대상이 아님 (임베딩 생략)
+        if route_by_slots(request.messages, user_profile(request)).route == "ask_llm":
+            return None, None
+        context = normalize_context(request.constitution, request.allergies, request.dietary_restrictions, request.health_conditions)
+        cached, has_context = self._match_exact(context, query)
+        if cached is not None or not has_context:
+            return cached, (context, query, None)
+        vector = self._unit(await self.embeddings.aembed_query(query))
+        return self._match(context, vector), (context, query, vector)
+
+    async def astore(self, cache_key: Optional[Tuple], response: dict) -> Optional[str]:
+        """
+        레시피 응답을 저장하고 cache_id 를 반환합니다. 적중 응답에도 같은 cache_id 가 실리므로
+        Backend 는 이 값으로 이미 저장한 레시피를 찾아 다시 저장하지 않습니다.
+        """
+        if cache_key is None:
+            return None
+        context, query, vector = cache_key
+        if vector is None:
+            vector = self._unit(await self.embeddings.aembed_query(query))
+        cache_id = uuid.uuid4().hex
+        self._insert(context, query, vector, {**response, "cache_id": cache_id})
+        return cache_id
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+recipe_response_cache = SemanticResponseCache(
+    recipe_embedding,
+    threshold=settings.RECIPE_CACHE_SIMILARITY_THRESHOLD,
+    ttl_seconds=settings.RECIPE_CACHE_TTL_SECONDS,
+    max_entries=settings.RECIPE_CACHE_MAX_ENTRIES,
+)
@@ -1,26 +1,66 @@
 import os
+from typing import Optional
 from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 from core.config import settings
+from utils.embedding_cache import CachedEmbeddings
+from utils.vector_index import MemmapVectorIndex, MemmapRecipeRetriever
+
+RECIPE_EMBEDDING_MODEL = "text-embedding-3-small"
 
 # 환경 변수에서 API 키 사용
-recipe_embedding = OpenAIEmbeddings(
-    model="text-embedding-3-small",
-    api_key=settings.OPENAI_API_KEY,
-)
-# Chroma DB 디렉토리 설정
-recipe_vector_store = Chroma(
-    embedding_function=recipe_embedding,
-    collection_name="recipe_vector_store",
-    persist_directory="./chroma.sqlite3",
+# 질의 임베딩은 메모리 LRU + SQLite 캐시를 거쳐 반복 질의의 네트워크 왕복을 줄임
+recipe_embedding = CachedEmbeddings(
+    OpenAIEmbeddings(
+        model=RECIPE_EMBEDDING_MODEL,
+        api_key=settings.OPENAI_API_KEY,
+    ),
+    model_name=RECIPE_EMBEDDING_MODEL,
+    db_path=settings.RECIPE_EMBEDDING_CACHE_PATH or None,
+    max_entries=settings.RECIPE_EMBEDDING_CACHE_MAX_ENTRIES,
+    batch_window_ms=settings.RECIPE_EMBEDDING_BATCH_WINDOW_MS,
 )
 
-recipe_retriever = recipe_vector_store.as_retriever(search_kwargs={"k": 4})
-reteriver = recipe_vector_store.as_retriever(search_kwargs={"k": 4})
-vectorstore = Chroma(
-    embedding_function=recipe_embedding,
-    collection_name="recipe_vector_store",
-    persist_directory="./chroma.sqlite3e",
-)
+
+def _chroma_recipe_retriever():
+    # Chroma DB 디렉토리 설정
+    recipe_vector_store = Chroma(
+        embedding_function=recipe_embedding,
+        collection_name="recipe_vector_store",
+        persist_directory="./chroma.sqlite3",
+    )
+    return recipe_vector_store.as_retriever(search_kwargs={"k": 4})
+
+
+def _build_recipe_retriever():
+    """사전 구축된 memmap 인덱스가 있으면 사용하고, 없거나 임베딩 모델이 다르면 Chroma 로 대체합니다."""
+    index = MemmapVectorIndex.load(settings.RECIPE_VECTOR_INDEX_DIR, settings.SEOUPSENG_CSV_PATH)
+    if index is not None and index.model == RECIPE_EMBEDDING_MODEL:
+        print(f"memmap 레시피 인덱스 사용: {settings.RECIPE_VECTOR_INDEX_DIR} ({index.meta['count']}건, {index.meta['dtype']})")
+        return MemmapRecipeRetriever(
+            index=index,
+            embeddings=recipe_embedding,
+            k=4,
+            constitution_weight=settings.RECIPE_CONSTITUTION_RANK_WEIGHT,
+            forbidden_penalty=settings.RECIPE_CONSTITUTION_FORBIDDEN_PENALTY,
+        )
+    if index is not None:
+        print(f"memmap 레시피 인덱스 임베딩 모델 불일치({index.model} != {RECIPE_EMBEDDING_MODEL}), Chroma 사용")
+    return _chroma_recipe_retriever()
+
+
+recipe_retriever = _build_recipe_retriever()
+reteriver = recipe_retriever
+
+
+def retrieve_recipes(query: str, constitution: Optional[str] = None):
+    """체질 적합도 순위 보정은 memmap 인덱스에서만 지원 (Chroma 는 체질을 무시)"""
+    if constitution and isinstance(recipe_retriever, MemmapRecipeRetriever):
+        return recipe_retriever.invoke(query, constitution=constitution)
+    return recipe_retriever.invoke(query)
 
 
+async def aretrieve_recipes(query: str, constitution: Optional[str] = None):
+    if constitution and isinstance(recipe_retriever, MemmapRecipeRetriever):
+        return await recipe_retriever.ainvoke(query, constitution=constitution)
+    return await recipe_retriever.ainvoke(query)
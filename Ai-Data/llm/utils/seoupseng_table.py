@@ -0,0 +1,235 @@
+import csv
+import json
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import numpy as np
+from core.config import settings
+
+# 섭생표 열 순서 (CSV 헤더와 동일)
+CONSTITUTIONS = ["목양", "목음", "토양", "토음", "금양", "금음", "수양", "수음"]
+
+_ALIAS_STOPWORDS = ("대부분의", "일반", "등")
+
+# 섭생표 기호 → 점수 (OO: 매우 좋음 ~ XX: 금기)
+RATING_SCORES = {"OO": 2.0, "O": 1.0, "△": 0.0, "X": -1.0, "XX": -2.0}
+FORBIDDEN_SCORE = RATING_SCORES["XX"]
+
+# 재료 문자열 → 행 번호 매칭 캐시 최대 크기
+MATCH_CACHE_MAX_ENTRIES = 4096
+
+
+# 재료명 동의어 → 섭생표 표기 (부분 문자열 치환)
+INGREDIENT_SYNONYMS = {
+    "소고기": "쇠고기",
+    "한우": "쇠고기",
+    "차돌박이": "쇠고기",
+    "우삼겹": "쇠고기",
+    "삼겹살": "돼지고기",
+    "목살": "돼지고기",
+    "앞다리살": "돼지고기",
+    "돼지등갈비": "돼지고기",
+    "닭가슴살": "닭고기",
+    "닭다리": "닭고기",
+    "닭봉": "닭고기",
+    "달걀": "계란",
+    "쌀밥": "쌀",
+    "흰쌀": "쌀",
+    "고추가루": "고춧가루",
+    "청양고추": "고추",
+    "홍고추": "고추",
+    "풋고추": "고추",
+    "부침가루": "밀가루",
+    "튀김가루": "밀가루",
+    # 한 글자 항목은 이름 전체가 같을 때만 매칭되므로 자주 쓰는 이름을 직접 연결
+    "대파": "파",
+    "쪽파": "파",
+    "생굴": "굴",
+}
+
+# 손질/조리 상태를 나타내는 앞말 (재료 자체와 무관)
+_INGREDIENT_PREFIXES = ("다진", "채썬", "송송썬", "삶은", "데친", "불린", "깐", "손질한", "냉동", "국거리용", "국거리")
+
+
+def normalize_ingredient(ingredient: str) -> str:
+    """'다진 소고기 200g (국거리용)' → '쇠고기' : 수량/괄호/공백/손질 표현 제거 후 동의어 통일"""
+    name = re.split(r"\d", ingredient, maxsplit=1)[0] or ingredient
+    name = re.sub(r"\(.*?\)|\[.*?\]|\s+", "", name)
+    for prefix in _INGREDIENT_PREFIXES:
+        if name.startswith(prefix) and len(name) > len(prefix):
+            name = name[len(prefix):]
+    for synonym, canonical in INGREDIENT_SYNONYMS.items():
+        if synonym in name:
+            name = name.replace(synonym, canonical)
+    return name
+
+
+def _normalized_score(values: np.ndarray) -> np.ndarray:
+    # 평균 점수(-2~2)를 0~1 로 정규화
+    return (values.mean(axis=0) - FORBIDDEN_SCORE) / (RATING_SCORES["OO"] - FORBIDDEN_SCORE)
+
+
+class CompatibilityScore(NamedTuple):
+    score: float                # 0~1 로 정규화한 평균 적합도
+    has_forbidden: bool         # 대상 체질에 XX 재료 포함 여부
+    matched_rows: List[int]     # 섭생표에서 매칭된 행 번호
+
+
+def normalize_constitution(name: Optional[str]) -> Optional[str]:
+    """'목양체질', '목양 체질' 등을 섭생표 열 이름('목양')으로 맞춥니다."""
+    if not name:
+        return None
+    key = re.sub(r"\s+", "", name).replace("체질", "")
+    return key if key in CONSTITUTIONS else None
+
+
+def _food_aliases(label: str) -> List[str]:
+    """'뿌리채소 (무,당근,연근 등)' → ['뿌리채소', '무', '당근', '연근']"""
+    parts = re.split(r"[(),/]", label)
+    aliases = []
+    for part in parts:
+        for word in part.split(","):
+            for stopword in _ALIAS_STOPWORDS:
+                word = word.replace(stopword, " ")
+            word = re.sub(r"\s+", "", word)
+            if word and re.search(r"[가-힣]", word) and word not in ("냉", "온"):
+                aliases.append(word)
+    return aliases
+
+
+class SeoupsengTable:
+    """섭생표(음식 × 체질)를 메모리에 올려 두고 재료 이름으로 행을 찾는 인덱스"""
+
+    def __init__(self, header: List[str], rows: List[List[str]]):
+        self.header = header
+        self.rows = rows
+        self.alias_to_row: Dict[str, int] = {}
+        for row_id, row in enumerate(rows):
+            for alias in _food_aliases(row[0]):
+                # 중복 항목(토마토, 생강 등)은 먼저 나온 행을 사용
+                self.alias_to_row.setdefault(alias, row_id)
+        # 긴 별칭부터 검사해야 '감자'가 '감'보다 먼저 매칭됨
+        self._aliases = sorted(self.alias_to_row, key=len, reverse=True)
+        # (음식 수 × 8 체질) 점수 행렬: 'O(온)' 같은 표기는 괄호 앞 기호만 사용
+        self.ratings = np.array(
+            [[RATING_SCORES.get(value.split("(")[0].strip(), 0.0) for value in row[1:len(CONSTITUTIONS) + 1]] for row in rows],
+            dtype=np.float32,
+        )
+        # 모든 체질에서 XX 인 행(술, 담배 등)은 체질 구분 없는 일반 항목이라 금기 판정에서 제외
+        self._constitution_forbidden = ~(self.ratings <= FORBIDDEN_SCORE).all(axis=1)
+        self._match_cache: "OrderedDict[str, Optional[int]]" = OrderedDict()
+
+    @classmethod
+    def from_csv(cls, path: str) -> "SeoupsengTable":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = [row for row in reader if row and row[0].strip()]
+        return cls(header, rows)
+
+    def match_ingredient(self, ingredient: str) -> Optional[int]:
+        """재료 이름 하나에 해당하는 섭생표 행 번호를 반환합니다."""
+        # '대파 1/2대' → '대파', '소고기 200g' → '쇠고기'
+        name = normalize_ingredient(ingredient)
+        for alias in self._aliases:
+            if alias not in name:
+                continue
+            # 한 글자 별칭(무, 배, 김, 술 ...)은 오탐이 많아 ('맛술' → '술') 이름 전체가 같을 때만 인정
+            if len(alias) == 1 and name != alias:
+                continue
+            return self.alias_to_row[alias]
+        return None
+
+    def _cached_match(self, ingredient: str) -> Optional[int]:
+        if ingredient in self._match_cache:
+            self._match_cache.move_to_end(ingredient)
+            return self._match_cache[ingredient]
+        row = self.match_ingredient(ingredient)
+        self._match_cache[ingredient] = row
+        while len(self._match_cache) > MATCH_CACHE_MAX_ENTRIES:
+            self._match_cache.popitem(last=False)
+        return row
+
+    def match_rows(self, ingredients: Iterable[str]) -> List[int]:
+        matched = {self._cached_match(ingredient) for ingredient in ingredients}
+        matched.discard(None)
+        return sorted(matched)
+
+    def score(self, ingredients: Iterable[str], constitution: Optional[str]) -> Optional[CompatibilityScore]:
+        """
+        레시피 재료의 체질 적합도를 섭생표 점수 행렬로 계산합니다.
+        체질을 알 수 없거나 매칭되는 재료가 없으면 None을 반환합니다.
+        """
+        column = normalize_constitution(constitution)
+        if column is None:
+            return None
+        rows = self.match_rows(ingredients)
+        if not rows:
+            return None
+        values = self.ratings[rows, CONSTITUTIONS.index(column)]
+        forbidden = (values <= FORBIDDEN_SCORE) & self._constitution_forbidden[rows]
+        return CompatibilityScore(
+            score=float(_normalized_score(values)),
+            has_forbidden=bool(forbidden.any()),
+            matched_rows=rows,
+        )
+
+    def compatibility_matrix(self, recipes: List[List[str]]):
+        """
+        레시피별 8체질 적합도 벡터를 계산합니다.
+        반환: (레시피 수 × 8) 적합도(0~1, 매칭 재료가 없으면 NaN), (레시피 수 × 8) XX 재료 포함 여부
+        """
+        scores = np.full((len(recipes), len(CONSTITUTIONS)), np.nan, dtype=np.float32)
+        forbidden = np.zeros((len(recipes), len(CONSTITUTIONS)), dtype=bool)
+        for i, ingredients in enumerate(recipes):
+            rows = self.match_rows(ingredients)
+            if not rows:
+                continue
+            values = self.ratings[rows]
+            scores[i] = _normalized_score(values)
+            forbidden[i] = ((values <= FORBIDDEN_SCORE) & self._constitution_forbidden[rows, None]).any(axis=0)
+        return scores, forbidden
+
+    def render(self, row_ids: List[int], constitution: Optional[str] = None) -> str:
+        """선택된 행만 CSV 텍스트로 만듭니다. 체질이 주어지면 해당 체질 열만 포함합니다."""
+        column = normalize_constitution(constitution)
+        columns = [CONSTITUTIONS.index(column) + 1] if column else list(range(1, len(self.header)))
+        lines = [",".join([self.header[0]] + [self.header[c] for c in columns])]
+        for row_id in row_ids:
+            row = self.rows[row_id]
+            label = f'"{row[0]}"' if "," in row[0] else row[0]
+            lines.append(",".join([label] + [row[c] for c in columns]))
+        if not row_ids:
+            lines.append("(레시피 재료 중 섭생표에 해당하는 식재료 없음)")
+        return "\n".join(lines)
+
+
+def extract_ingredients(recipe) -> List[str]:
+    """레시피(JSON 문자열, dict, 리스트, Recipe 객체)에서 재료 목록을 꺼냅니다."""
+    if hasattr(recipe, "ingredients"):
+        return list(recipe.ingredients)
+    if isinstance(recipe, str):
+        try:
+            recipe = json.loads(recipe)
+        except Exception:
+            # ```json 코드 블록 등으로 감싸진 경우 가장 바깥 JSON만 다시 시도
+            found = re.search(r"[\[{].*[\]}]", recipe, re.S)
+            try:
+                recipe = json.loads(found.group(0)) if found else None
+            except Exception:
+                return []
+    if isinstance(recipe, dict):
+        return list(recipe.get("ingredients") or [])
+    if isinstance(recipe, list):
+        ingredients = []
+        for item in recipe:
+            ingredients.extend(extract_ingredients(item))
+        return ingredients
+    return []
+
+
+@lru_cache(maxsize=1)
+def get_seoupseng_table() -> SeoupsengTable:
+    """섭생표 CSV를 프로세스당 한 번만 읽습니다."""
+    return SeoupsengTable.from_csv(settings.SEOUPSENG_CSV_PATH)
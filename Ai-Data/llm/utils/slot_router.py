@@ -0,0 +1,115 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# 라우팅 시스템 프롬프트(consitiution_recipe_route_system)의 질문 목록과 같은 슬롯
+REQUIRED_SLOTS = ("allergies", "dietary_restrictions", "servings")
+OPTIONAL_SLOTS = ("constitution", "health_conditions", "preferred_food", "cooking_tools")
+
+FILLED = "filled"
+MISSING = "missing"
+AMBIGUOUS = "ambiguous"
+
+# 어시스턴트가 해당 슬롯을 물어봤는지 판단하는 키워드
+_QUESTION_LEXICON = {
+    "allergies": re.compile(r"알레르기|알러지|과민"),
+    "dietary_restrictions": re.compile(r"식이\s*제한|제한.{0,6}(음식|식단)|가리는|피해야|채식|못\s*드시|안\s*드시"),
+    "servings": re.compile(r"인원|몇\s*(분|명|인분)|인분|누구와|몇\s*사람"),
+    "constitution": re.compile(r"체질"),
+    "health_conditions": re.compile(r"건강|질환|지병|복용"),
+    "preferred_food": re.compile(r"선호|좋아하|원하시는\s*(음식|요리)|드시고\s*싶"),
+    "cooking_tools": re.compile(r"조리\s*도구|도구|에어\s*프라이어|오븐|전자레인지"),
+}
+
+# 사용자 발화에서 슬롯 값이 직접 드러나는 패턴
+_VALUE_LEXICON = {
+    "allergies": re.compile(r"(알레르기|알러지).{0,10}(있|없|않)|(견과|땅콩|갑각류|새우|게|우유|유제품|계란|달걀|밀가루|밀|대두|콩|복숭아|메밀|생선|조개|고등어)\S{0,3}\s*(알레르기|알러지)"),
+    "dietary_restrictions": re.compile(r"채식|비건|베지|페스코|저염|저당|저탄고지|키토|글루텐|할랄|다이어트|(식이\s*제한|제한|가리는\s*(것|거|음식)).{0,10}(있|없|않)|아무거나\s*(잘\s*)?먹"),
+    "servings": re.compile(r"\d+\s*(인분|명|인|사람)|(한|두|세|네|다섯|여섯)\s*(인분|명|사람)|(혼자|둘이|셋이|넷이|가족|부부|우리\s*둘)"),
+    "constitution": re.compile(r"(목|토|금|수)(양|음)\s*체질|체질.{0,6}(모르|몰라)"),
+    "health_conditions": re.compile(r"당뇨|고혈압|혈압|빈혈|위염|소화|변비|비만|건강.{0,6}(문제|이상)?\s*(없|괜찮)"),
+    "preferred_food": re.compile(r"(국|찌개|탕|볶음|구이|조림|무침|죽|면|밥|샐러드|디저트|한식|중식|일식|양식).{0,6}(먹고|원해|좋아|추천)"),
+    "cooking_tools": re.compile(r"에어\s*프라이어|오븐|전자레인지|가스레인지|인덕션|냄비|프라이팬|밥솥"),
+}
+
+_NEGATIVE_ANSWER = re.compile(r"^\s*(아니요|아뇨|없(어요|습니다|어|음|고)?|딱히\s*없|특별히\s*없|노|no|none|x)\b", re.IGNORECASE)
+_UNCERTAIN_ANSWER = re.compile(r"모르|몰라|글쎄|잘\s*모|생각\s*안|\?|아직")
+
+
+class SlotRoute(NamedTuple):
+    route: Optional[str]        # 'recipe_gen' / 'ask_llm', 확신할 수 없으면 None
+    slots: Dict[str, str]       # 슬롯별 상태 (filled / missing / ambiguous)
+
+
+def user_profile(request) -> Dict:
+    """ChatRequest 의 사용자 정보 필드를 슬롯 이름 기준 dict 로 꺼냅니다."""
+    return {slot: getattr(request, slot, None) for slot in ("allergies", "dietary_restrictions", "constitution", "health_conditions")}
+
+
+def _turns(query) -> List[Tuple[str, str]]:
+    """LangChain 메시지 또는 {'role','content'} dict 목록을 (role, text) 목록으로 바꿉니다. system 메시지는 제외합니다."""
+    if isinstance(query, str):
+        return [("user", query)]
+    turns = []
+    for message in query or []:
+        if isinstance(message, dict):
+            role, content = message.get("role"), message.get("content", "")
+        else:
+            role, content = getattr(message, "type", None), getattr(message, "content", "")
+        role = {"human": "user", "ai": "assistant"}.get(role, role)
+        if role in ("user", "assistant") and isinstance(content, str):
+            turns.append((role, content))
+    return turns
+
+
+def last_user_text(query) -> str:
+    """대화의 마지막 사용자 발화 (없으면 빈 문자열)"""
+    return next((text for role, text in reversed(_turns(query)) if role == "user"), "")
+
+
+def extract_slots(query, profile: Optional[Dict] = None) -> Dict[str, str]:
+    """
+    대화에서 각 슬롯이 채워졌는지 키워드/패턴 사전으로 판정합니다.
+    profile 은 요청에 함께 온 사용자 정보(allergies, dietary_restrictions, constitution, health_conditions)로,
+    값이 있는 슬롯은 대화에서 다루지 않았어도 채워진 것으로 봅니다.
+    """
+    turns = _turns(query)
+    slots = {slot: FILLED if (profile or {}).get(slot) else MISSING for slot in REQUIRED_SLOTS + OPTIONAL_SLOTS}
+    for index, (role, text) in enumerate(turns):
+        if role == "user":
+            for slot, pattern in _VALUE_LEXICON.items():
+                if pattern.search(text):
+                    slots[slot] = FILLED
+            continue
+        # 어시스턴트 질문 바로 다음 사용자 발화를 해당 슬롯의 답변으로 봄
+        asked = [slot for slot, pattern in _QUESTION_LEXICON.items() if pattern.search(text)]
+        answer = next((t for r, t in turns[index + 1:index + 2] if r == "user"), None)
+        if not asked or answer is None:
+            continue
+        for slot in asked:
+            if slots[slot] == FILLED or _VALUE_LEXICON[slot].search(answer):
+                slots[slot] = FILLED
+            elif _UNCERTAIN_ANSWER.search(answer):
+                slots[slot] = AMBIGUOUS
+            elif _NEGATIVE_ANSWER.search(answer) and len(asked) == 1:
+                # '없어요' 같은 부정 답변은 질문이 하나였을 때만 그 슬롯의 답으로 인정
+                slots[slot] = FILLED
+            else:
+                slots[slot] = AMBIGUOUS
+    return slots
+
+
+def route_by_slots(query, profile: Optional[Dict] = None) -> SlotRoute:
+    """
+    필수 슬롯(알레르기, 식이 제한, 인원수)이 모두 채워지고 선택 슬롯도 모두 한 번 이상 다뤄졌으면 recipe_gen,
+    한 번도 다뤄지지 않은 필수 슬롯이 있으면 ask_llm 으로 LLM 없이 결정합니다.
+    (라우팅 프롬프트는 선택 슬롯도 물어본 뒤에 생성하도록 하므로, 선택 슬롯이 남아 있으면 확신하지 않음)
+    그 밖의 경우(답변이 애매하거나 묻지 않은 선택 슬롯이 남은 경우)에는 None 을 반환해 LLM 분류에 맡깁니다.
+    """
+    slots = extract_slots(query, profile)
+    required = [slots[slot] for slot in REQUIRED_SLOTS]
+    optional = [slots[slot] for slot in OPTIONAL_SLOTS]
+    if all(state == FILLED for state in required) and MISSING not in optional:
+        return SlotRoute("recipe_gen", slots)
+    if any(state == MISSING for state in required):
+        return SlotRoute("ask_llm", slots)
+    return SlotRoute(None, slots)
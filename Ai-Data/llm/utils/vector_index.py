@@ -0,0 +1,253 @@
+"""
+레시피 코퍼스용 사전 구축(memmap) 벡터 인덱스
+
+오프라인에서 한 번 임베딩해 아래 파일로 저장하고, 서비스는 numpy memmap 으로 읽어
+여러 uvicorn 워커가 페이지 캐시에 올라간 같은 행렬을 공유합니다.
+
+    <index_dir>/embeddings.npy   (문서 수 × 차원) float32 또는 int8, 행 단위 L2 정규화
+    <index_dir>/scales.npy       int8 일 때 행별 역양자화 스케일 (float32)
+    <index_dir>/documents.jsonl  문서 본문과 메타데이터 (행 순서 동일)
+    <index_dir>/meta.json        임베딩 모델, 차원, dtype, 원본 CSV sha256 등
+    <index_dir>/compatibility.npy  (문서 수 × 8) 섭생표 기반 체질 적합도 (0~1, 매칭 재료 없으면 NaN)
+    <index_dir>/forbidden.npy      (문서 수 × 8) 체질별 XX(금기) 재료 포함 여부
+
+구축 예:
+    python -m utils.vector_index --csv ../data/recipe_mainv2.csv --out ./data/recipe_vector_index --dtype int8
+    # 섭생표만 바뀌었을 때 (임베딩 재계산 없이 적합도만 갱신)
+    python -m utils.vector_index --out ./data/recipe_vector_index --compatibility-only
+"""
+import argparse
+import csv
+import json
+import os
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from utils.recipe_csv import file_sha256, literal_list
+from utils.seoupseng_table import CONSTITUTIONS, normalize_constitution
+
+META_FILE = "meta.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+SCALES_FILE = "scales.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+COMPATIBILITY_FILE = "compatibility.npy"
+FORBIDDEN_FILE = "forbidden.npy"
+INDEX_VERSION = 1
+
+
+def load_recipe_documents(csv_path: str) -> List[Document]:
+    """레시피 CSV(recipe_mainv2.csv)를 검색용 Document 목록으로 바꿉니다."""
+    csv.field_size_limit(1 << 30)
+    documents = []
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            title = (row.get("제목") or "").strip()
+            if not title:
+                continue
+            ingredients = literal_list(row.get("재료", ""))
+            steps = literal_list(row.get("조리순서", ""))
+            content = (
+                f"제목: {title}\n"
+                f"재료: {', '.join(ingredients)}\n"
+                f"조리순서: {', '.join(steps)}"
+            )
+            documents.append(Document(
+                page_content=content,
+                metadata={
+                    "name": title,
+                    "index": row.get("index"),
+                    "url": row.get("url"),
+                    "servings": row.get("인분"),
+                    "cook_time": row.get("조리시간"),
+                    "difficulty": row.get("난이도"),
+                    "ingredients": ingredients,
+                },
+            ))
+    return documents
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_int8(matrix: np.ndarray):
+    """행별 대칭 양자화: int8 값 × scale ≈ 원래 값"""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def build_index(csv_path: str, out_dir: str, embeddings: Embeddings, model_name: str, dtype: str = "float32", batch_size: int = 256) -> Dict:
+    """CSV 를 임베딩해 memmap 으로 읽을 수 있는 인덱스 파일을 만듭니다."""
+    documents = load_recipe_documents(csv_path)
+    vectors = []
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        vectors.extend(embeddings.embed_documents([doc.page_content for doc in batch]))
+        print(f"임베딩 진행: {min(start + batch_size, len(documents))}/{len(documents)}")
+    matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+    os.makedirs(out_dir, exist_ok=True)
+    if dtype == "int8":
+        matrix, scales = quantize_int8(matrix)
+        np.save(os.path.join(out_dir, SCALES_FILE), scales)
+    np.save(os.path.join(out_dir, EMBEDDINGS_FILE), np.ascontiguousarray(matrix))
+    with open(os.path.join(out_dir, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+        for doc in documents:
+            f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False) + "\n")
+    meta = {
+        "version": INDEX_VERSION,
+        "model": model_name,
+        "dim": int(matrix.shape[1]),
+        "count": int(matrix.shape[0]),
+        "dtype": dtype,
+        "source": os.path.basename(csv_path),
+        "source_sha256": file_sha256(csv_path),
+    }
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+def write_compatibility(out_dir: str, table, table_path: str) -> Dict:
+    """documents.jsonl 의 재료 목록과 섭생표로 레시피별 8체질 적합도를 계산해 인덱스에 추가합니다."""
+    with open(os.path.join(out_dir, DOCUMENTS_FILE), encoding="utf-8") as f:
+        recipes = [json.loads(line)["metadata"].get("ingredients") or [] for line in f if line.strip()]
+    scores, forbidden = table.compatibility_matrix(recipes)
+    np.save(os.path.join(out_dir, COMPATIBILITY_FILE), scores)
+    np.save(os.path.join(out_dir, FORBIDDEN_FILE), forbidden)
+    meta_path = os.path.join(out_dir, META_FILE)
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["seoupseng_sha256"] = file_sha256(table_path)
+    meta["compatibility_coverage"] = float(1 - np.isnan(scores[:, 0]).mean()) if len(scores) else 0.0
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class MemmapVectorIndex:
+    """build_index 로 만든 인덱스를 memmap 으로 열어 내적 기반 top-k 검색을 수행합니다."""
+
+    def __init__(self, index_dir: str, seoupseng_path: Optional[str] = None):
+        with open(os.path.join(index_dir, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        # mmap_mode='r' : 워커마다 복사하지 않고 OS 페이지 캐시를 공유
+        self.matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        scales_path = os.path.join(index_dir, SCALES_FILE)
+        self.scales = np.load(scales_path) if self.meta.get("dtype") == "int8" and os.path.exists(scales_path) else None
+        with open(os.path.join(index_dir, DOCUMENTS_FILE), encoding="utf-8") as f:
+            self.documents = [json.loads(line) for line in f if line.strip()]
+        compatibility_path = os.path.join(index_dir, COMPATIBILITY_FILE)
+        if os.path.exists(compatibility_path) and self._compatibility_current(seoupseng_path):
+            self.compatibility = np.load(compatibility_path, mmap_mode="r")
+            self.forbidden = np.load(os.path.join(index_dir, FORBIDDEN_FILE), mmap_mode="r")
+        else:
+            self.compatibility = self.forbidden = None
+        if len(self.documents) != self.matrix.shape[0]:
+            raise ValueError(f"벡터 인덱스 문서 수 불일치: {len(self.documents)} != {self.matrix.shape[0]}")
+
+    def _compatibility_current(self, seoupseng_path: Optional[str]) -> bool:
+        """적합도를 계산할 때의 섭생표와 현재 섭생표가 같은지 확인 (다르면 적합도 보정을 끔)"""
+        if not seoupseng_path or not os.path.exists(seoupseng_path):
+            return True
+        if self.meta.get("seoupseng_sha256") == file_sha256(seoupseng_path):
+            return True
+        print("벡터 인덱스 체질 적합도가 현재 섭생표와 다름: 적합도 보정을 사용하지 않습니다. "
+              "(python -m utils.vector_index --compatibility-only 로 다시 계산)")
+        return False
+
+    @classmethod
+    def load(cls, index_dir: Optional[str], seoupseng_path: Optional[str] = None) -> Optional["MemmapVectorIndex"]:
+        """인덱스가 없거나 읽을 수 없으면 None 을 반환합니다. seoupseng_path 가 주어지면 적합도 파일의 섭생표 sha256 을 확인합니다."""
+        if not index_dir or not os.path.exists(os.path.join(index_dir, META_FILE)):
+            return None
+        try:
+            return cls(index_dir, seoupseng_path)
+        except Exception as e:
+            print(f"벡터 인덱스 로드 실패: {index_dir}: {e}")
+            return None
+
+    @property
+    def model(self) -> Optional[str]:
+        return self.meta.get("model")
+
+    def scores(self, query_vector) -> np.ndarray:
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        if self.scales is None:
+            return self.matrix @ query
+        return (self.matrix @ query) * self.scales
+
+    def constitution_column(self, constitution: Optional[str]) -> Optional[int]:
+        column = normalize_constitution(constitution)
+        if column is None or self.compatibility is None:
+            return None
+        return CONSTITUTIONS.index(column)
+
+    def search(self, query_vector, k: int, constitution: Optional[str] = None, weight: float = 0.0, forbidden_penalty: float = 0.0) -> List[Document]:
+        """
+        내적 유사도로 top-k 를 찾습니다. 체질이 주어지면 사전 계산된 적합도로 순위를 보정합니다.
+        (순위 점수 = 유사도 + weight × (적합도 - 0.5) - forbidden_penalty × 금기 재료 포함)
+        """
+        scores = self.scores(query_vector)
+        column = self.constitution_column(constitution)
+        if column is not None:
+            compatibility = np.nan_to_num(self.compatibility[:, column] - 0.5, nan=0.0)
+            scores = scores + weight * compatibility - forbidden_penalty * self.forbidden[:, column]
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        documents = []
+        for i in top:
+            metadata = {**self.documents[i]["metadata"], "score": float(scores[i])}
+            if column is not None and not np.isnan(self.compatibility[i, column]):
+                metadata["constitution_score"] = float(self.compatibility[i, column])
+            documents.append(Document(page_content=self.documents[i]["page_content"], metadata=metadata))
+        return documents
+
+
+class MemmapRecipeRetriever(BaseRetriever):
+    """Chroma 대신 memmap 인덱스를 사용하는 레시피 retriever (질의 임베딩만 네트워크 호출)"""
+
+    index: MemmapVectorIndex
+    embeddings: Embeddings
+    k: int = 4
+    constitution_weight: float = 0.0
+    forbidden_penalty: float = 0.0
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun, constitution: Optional[str] = None) -> List[Document]:
+        return self.index.search(self.embeddings.embed_query(query), self.k, constitution, self.constitution_weight, self.forbidden_penalty)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, constitution: Optional[str] = None) -> List[Document]:
+        return self.index.search(await self.embeddings.aembed_query(query), self.k, constitution, self.constitution_weight, self.forbidden_penalty)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="레시피 memmap 벡터 인덱스 구축")
+    parser.add_argument("--csv", default="../data/recipe_mainv2.csv", help="레시피 CSV 경로")
+    parser.add_argument("--out", default=None, help="인덱스 출력 디렉토리 (기본: RECIPE_VECTOR_INDEX_DIR)")
+    parser.add_argument("--dtype", choices=["float32", "int8"], default="float32", help="저장 dtype")
+    parser.add_argument("--batch-size", type=int, default=256, help="임베딩 요청당 문서 수")
+    parser.add_argument("--compatibility-only", action="store_true", help="임베딩은 그대로 두고 체질 적합도만 다시 계산")
+    args = parser.parse_args()
+
+    from core.config import settings
+    from utils.seoupseng_table import get_seoupseng_table
+
+    out_dir = args.out or settings.RECIPE_VECTOR_INDEX_DIR
+    if not args.compatibility_only:
+        from utils.retriever import RECIPE_EMBEDDING_MODEL, recipe_embedding
+        build_index(args.csv, out_dir, recipe_embedding, RECIPE_EMBEDDING_MODEL, args.dtype, args.batch_size)
+    result = write_compatibility(out_dir, get_seoupseng_table(), settings.SEOUPSENG_CSV_PATH)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
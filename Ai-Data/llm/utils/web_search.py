@@ -0,0 +1,217 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple
+from core.config import settings
+
+
+def normalize_search_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query or "").strip().lower()
+
+
+class DuckDuckGoProvider:
+    """DuckDuckGo 검색 (도구 인스턴스는 처음 검색할 때 한 번만 생성)"""
+
+    name = "duckduckgo"
+
+    def __init__(self):
+        self._tool = None
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> str:
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    from langchain_community.tools import DuckDuckGoSearchRun
+                    self._tool = DuckDuckGoSearchRun()
+        return self._tool.invoke(query)
+
+
+class LocalFileProvider:
+    """
+    오프라인 테스트/벤치마크용 검색 결과 파일 ({"질의": "결과 텍스트", ...} JSON)
+    정확히 같은 질의가 없으면 단어가 가장 많이 겹치는 항목을 반환합니다.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str, latency_seconds: float = 0.0):
+        with open(path, encoding="utf-8") as f:
+            self.results: Dict[str, str] = {normalize_search_query(k): v for k, v in json.load(f).items()}
+        self.latency_seconds = latency_seconds
+
+    def search(self, query: str) -> str:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        key = normalize_search_query(query)
+        if key in self.results:
+            return self.results[key]
+        words = set(key.split())
+        best = max(self.results, key=lambda k: len(words & set(k.split())), default=None)
+        if best is None or not words & set(best.split()):
+            return ""
+        return self.results[best]
+
+
+class WebSearch:
+    """
+    웹 검색 호출 래퍼: 질의별 TTL 캐시, 호출당 제한 시간, 연속 실패 시 일정 시간 검색을 건너뛰는 서킷 브레이커.
+    실패/시간 초과/차단 시에는 빈 문자열을 반환해 그래프가 검색 결과 없이 계속 진행하도록 합니다.
+    """
+
+    def __init__(self, provider, timeout_seconds: float, ttl_seconds: int, max_entries: int,
+                 failure_threshold: int, cooldown_seconds: float, max_workers: int = 4):
+        self.provider = provider
+        self.timeout_seconds = timeout_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        # 느린 검색이 공용 스레드 풀(run_sync)을 점유하지 않도록 전용 풀 사용
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self.stats_counter = {"hits": 0, "misses": 0, "timeouts": 0, "errors": 0, "skipped": 0}
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            created_at, result = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return result
+
+    def _store(self, key: str, result: str):
+        with self._lock:
+            self._cache[key] = (time.time(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _circuit_open(self) -> bool:
+        return time.time() < self._open_until
+
+    def _admit_call(self) -> Tuple[bool, bool]:
+        """(호출 여부, 시험 호출 여부). self._lock 안에서 호출합니다."""
+        if self._circuit_open():
+            return False, False
+        if self._failures >= self.failure_threshold:
+            # 차단 시간이 지나면 시험 호출 하나만 보내고(half-open), 결과가 나올 때까지 나머지는 건너뜀
+            if self._probe_in_flight:
+                return False, False
+            self._probe_in_flight = True
+            return True, True
+        return True, False
+
+    def _end_probe(self):
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+
+    def _record_failure(self, kind: str, query: str, error: Exception = None):
+        with self._lock:
+            self.stats_counter[kind] += 1
+            self._failures += 1
+            failures = self._failures
+            if failures >= self.failure_threshold:
+                self._open_until = time.time() + self.cooldown_seconds
+        print(f"웹 검색 실패({kind}): query={query}, error={error}, 연속 실패={failures}")
+
+    def _before_call(self, query: str):
+        """(캐시 키, 캐시 결과 또는 None, 호출 여부, 시험 호출 여부)"""
+        key = normalize_search_query(query)
+        cached = self._cached(key)
+        with self._lock:
+            if cached is not None:
+                self.stats_counter["hits"] += 1
+                return key, cached, False, False
+            should_call, probe = self._admit_call()
+            self.stats_counter["misses" if should_call else "skipped"] += 1
+        if not should_call:
+            print(f"웹 검색 서킷 브레이커 열림, 검색 생략: query={query}")
+            return key, "", False, False
+        return key, None, True, probe
+
+    def search(self, query: str) -> str:
+        key, result, should_call, probe = self._before_call(query)
+        if not should_call:
+            return result
+        try:
+            future = self._executor.submit(self.provider.search, query)
+            try:
+                result = future.result(timeout=self.timeout_seconds)
+            except FutureTimeoutError as e:
+                self._record_failure("timeouts", query, e)
+                return ""
+            except Exception as e:
+                self._record_failure("errors", query, e)
+                return ""
+            self._record_success()
+        finally:
+            if probe:
+                self._end_probe()
+        self._store(key, result)
+        return result
+
+    async def asearch(self, query: str) -> str:
+        key, result, should_call, probe = self._before_call(query)
+        if not should_call:
+            return result
+        try:
+            future = asyncio.wrap_future(self._executor.submit(self.provider.search, query))
+            try:
+                result = await asyncio.wait_for(future, timeout=self.timeout_seconds)
+            except asyncio.TimeoutError as e:
+                self._record_failure("timeouts", query, e)
+                return ""
+            except Exception as e:
+                self._record_failure("errors", query, e)
+                return ""
+            self._record_success()
+        finally:
+            # 시험 호출이 취소되어도 다음 요청이 다시 시험할 수 있도록 해제
+            if probe:
+                self._end_probe()
+        self._store(key, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            **self.stats_counter,
+            "provider": self.provider.name,
+            "cache_size": len(self._cache),
+            "circuit_open": self._circuit_open(),
+            "probe_in_flight": self._probe_in_flight,
+            "consecutive_failures": self._failures,
+        }
+
+
+def _build_provider():
+    if settings.WEB_SEARCH_PROVIDER == "local":
+        return LocalFileProvider(settings.WEB_SEARCH_LOCAL_PATH, settings.WEB_SEARCH_LOCAL_LATENCY_SECONDS)
+    return DuckDuckGoProvider()
+
+
+recipe_web_search = WebSearch(
+    _build_provider(),
+    timeout_seconds=settings.WEB_SEARCH_TIMEOUT_SECONDS,
+    ttl_seconds=settings.WEB_SEARCH_CACHE_TTL_SECONDS,
+    max_entries=settings.WEB_SEARCH_CACHE_MAX_ENTRIES,
+    failure_threshold=settings.WEB_SEARCH_FAILURE_THRESHOLD,
+    cooldown_seconds=settings.WEB_SEARCH_COOLDOWN_SECONDS,
+)
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import requests
 from core.config import AI_DATA_URL
 import json
-from db.session import get_recipe_db, get_chat_db
-from crud.recipe import create_recipe as crud_create_recipe
+from db.session import get_recipe_db, get_chat_db, recipe_db
+from crud.recipe import create_recipe as crud_create_recipe, get_recipes_by_response_cache_id
 from crud.chat import add_chat_message as crud_add_chat_message
 import httpx
 
@@ -25,6 +26,49 @@ class ChatProxyResponse(BaseModel):
 
 router = APIRouter()
 
+def build_ai_payload(req: ChatProxyRequest) -> dict:
+    # AI 서버로 보낼 payload에 사용자 컨텍스트 포함
+    return {
+        "messages": [{"role": m["role"], "content": m["content"]} for m in req.messages],
+        "session_id": req.session_id,
+        "feature": req.feature,
+        "allergies": req.allergies,
+        "constitution": req.constitution,
+        "dietary_restrictions": req.dietary_restrictions,
+        "health_conditions": req.health_conditions
+    }
+
+async def store_recipes(data: dict, request: Request):
+    """
+    AI 응답이 레시피라면 레시피 API로 저장하고 message를 저장된 레시피 목록으로 교체합니다.
+    AI 캐시 적중 응답은 같은 cache_id 로 이미 저장된 레시피를 그대로 사용합니다.
+    """
+    if data.get("is_recipe") and isinstance(data.get("message"), str):
+        try:
+            cache_id = data.get("cache_id")
+            if data.get("cached") and cache_id:
+                stored = await get_recipes_by_response_cache_id(recipe_db, cache_id)
+                if stored:
+                    data["message"] = json.dumps(stored, ensure_ascii=False, default=str)
+                    print("캐시 응답 레시피 재사용: total=", len(stored))
+                    return
+            recipes_list = json.loads(data["message"])
+            # 리다이렉트 없이 올바른 스킴과 호스트를 사용하기 위해 base_url 활용
+            api_base = str(request.base_url).rstrip("/")
+            stored = []
+            # 리다이렉트를 따라가도록 설정
+            async with httpx.AsyncClient(follow_redirects=True) as client:
+                for recipe in recipes_list:
+                    if cache_id:
+                        recipe["responseCacheId"] = cache_id
+                    r = await client.post(f"{api_base}/api/v1/recipes/save", json=recipe, follow_redirects=True)
+                    r.raise_for_status()
+                    stored.append(r.json())
+            data["message"] = json.dumps(stored, ensure_ascii=False)
+            print("레시피 API 저장 및 업데이트 성공: total=", len(stored))
+        except Exception as e:
+            print("레시피 API 저장 실패:", e)
+
 @router.post(
     "",
     response_model=ChatProxyResponse,
@@ -46,16 +90,7 @@ async def proxy_chat(
             if last_msg.get('role') == 'user':
                 await crud_add_chat_message(chat_db, req.session_id, 'user', last_msg.get('content'))
         url = f"{AI_DATA_URL}/api/v1/constitution_recipe"
-        # AI 서버로 보낼 payload에 사용자 컨텍스트 포함
-        payload = {
-            "messages": [{"role": m["role"], "content": m["content"]} for m in req.messages],
-            "session_id": req.session_id,
-            "feature": req.feature,
-            "allergies": req.allergies,
-            "constitution": req.constitution,
-            "dietary_restrictions": req.dietary_restrictions,
-            "health_conditions": req.health_conditions
-        }
+        payload = build_ai_payload(req)
         resp = requests.post(url, json=payload, timeout=None)
         print(f"status_code: {resp.status_code}")
         try:
@@ -66,22 +101,7 @@ async def proxy_chat(
             print(f"Response text: {resp.text}")
             raise HTTPException(status_code=500, detail=f"AI 서버 응답이 JSON이 아님: {resp.text}")
         resp.raise_for_status()
-        if data.get("is_recipe") and isinstance(data.get("message"), str):
-            try:
-                recipes_list = json.loads(data["message"])
-                # 리다이렉트 없이 올바른 스킴과 호스트를 사용하기 위해 base_url 활용
-                api_base = str(request.base_url).rstrip("/")
-                stored = []
-                # 리다이렉트를 따라가도록 설정
-                async with httpx.AsyncClient(follow_redirects=True) as client:
-                    for recipe in recipes_list:
-                        r = await client.post(f"{api_base}/api/v1/recipes/save", json=recipe, follow_redirects=True)
-                        r.raise_for_status()
-                        stored.append(r.json())
-                data["message"] = json.dumps(stored, ensure_ascii=False)
-                print("레시피 API 저장 및 업데이트 성공: total=", len(stored))
-            except Exception as e:
-                print("레시피 API 저장 실패:", e)
+        await store_recipes(data, request)
         if "message" not in data:
             raise HTTPException(status_code=500, detail=f"AI 서버 응답에 'message' 필드가 없음: {data}")
         # 백엔드로부터 받은 응답을 DB에 저장
@@ -91,4 +111,68 @@ async def proxy_chat(
         return ChatProxyResponse(message=data["message"], is_recipe=data.get("is_recipe", False))
     except Exception as e:
         print(f"Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def iter_sse_events(resp: httpx.Response):
+    """SSE 스트림을 (event, data 문자열) 단위로 나눕니다."""
+    event, data_lines = "message", []
+    async for line in resp.aiter_lines():
+        if not line:
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+    if data_lines:
+        yield event, "\n".join(data_lines)
+
+@router.post(
+    "/stream",
+    summary="사용자-LLM 프록시 스트리밍 챗",
+    description="LLM 서비스의 Server-Sent Events(노드 진행, 토큰)를 그대로 중계하고, 완료 시 최종 메시지를 저장합니다."
+)
+async def proxy_chat_stream(
+    req: ChatProxyRequest,
+    request: Request,
+    chat_db=Depends(get_chat_db)
+):
+    # 사용자가 보낸 메시지를 DB에 저장
+    if req.session_id and req.messages:
+        last_msg = req.messages[-1]
+        if last_msg.get('role') == 'user':
+            await crud_add_chat_message(chat_db, req.session_id, 'user', last_msg.get('content'))
+    url = f"{AI_DATA_URL}/api/v1/constitution_recipe/stream"
+    payload = build_ai_payload(req)
+
+    async def relay():
+        try:
+            timeout = httpx.Timeout(10.0, read=None)
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                async with client.stream("POST", url, json=payload) as resp:
+                    resp.raise_for_status()
+                    async for event, raw in iter_sse_events(resp):
+                        if event != "done":
+                            yield f"event: {event}\ndata: {raw}\n\n"
+                            continue
+                        # 최종 응답: 레시피 저장 및 대화 기록 저장 후 클라이언트에 전달
+                        data = json.loads(raw)
+                        await store_recipes(data, request)
+                        if req.session_id:
+                            await crud_add_chat_message(chat_db, req.session_id, 'assistant', data.get("message", ""))
+                        final = ChatProxyResponse(message=data.get("message", ""), is_recipe=data.get("is_recipe", False))
+                        yield sse_event("done", final.dict())
+        except Exception as e:
+            print(f"Error: {e}")
+            yield sse_event("error", {"error": str(e)})
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -33,9 +33,16 @@ async def proxy_constitution(
     db=Depends(get_user_db)
 ):
     try:
-        payload = {"answers": req.answers}
+        # 진단 세션은 사용자 단위: 빈 answers 는 새 진단 시작, 이후에는 새 답변 하나만 전송
+        if req.answers:
+            payload = {"session_id": user_id, "answer": req.answers[-1], "turn": len(req.answers)}
+        else:
+            payload = {"session_id": user_id, "answers": []}
         # LLM 진단 서비스 호출 (trailing slash 필수)
         resp = requests.post(f"{AI_DATA_URL}/api/v1/diagnose/", json=payload, timeout=None)
+        if resp.status_code == 409:
+            # 세션 만료/불일치 시 전체 답변으로 세션을 다시 만듦
+            resp = requests.post(f"{AI_DATA_URL}/api/v1/diagnose/", json={"session_id": user_id, "answers": req.answers}, timeout=None)
         try:
             data = resp.json()
         except Exception as err:
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-import requests
+import httpx
 import json
 from datetime import datetime
 import uuid  # for experiment_id generation
@@ -93,12 +93,12 @@ def combine_scores(recipe_score, cost_score, recipe_weight=0.7, cost_weight=0.3)
 async def test_experiment(req: TestRequest, db=Depends(get_recipe_db)):
     try:
         start_time = datetime.now()
-        # LLM 마이크로서비스 호출
-        resp = requests.post(
-            f"{AI_DATA_URL}/api/v1/constitution_recipe/test",
-            json=req.dict(),
-            timeout=None
-        )
+        # LLM 마이크로서비스 호출 (이벤트 루프를 막지 않도록 async 클라이언트 사용)
+        async with httpx.AsyncClient(timeout=None) as client:
+            resp = await client.post(
+                f"{AI_DATA_URL}/api/v1/constitution_recipe/test",
+                json=req.dict()
+            )
         resp.raise_for_status()
         print("resp",resp)
         data = resp.json()
@@ -7,6 +7,7 @@ from typing import List
 from schemas.auto_generate import AutoGenerateRecipeRequest
 import httpx
 from core.config import AI_DATA_URL
+from utils.recipe_dedup import reset_dedup_index
 
 router = APIRouter()
 
@@ -101,8 +102,10 @@ async def auto_generate_recipe(req: AutoGenerateRecipeRequest, db=Depends(get_re
     # DB에 저장 및 반환
     saved_recipes: list[dict] = []
     for item in generated:
-        saved = await crud_create_recipe(db, item)
-        saved_recipes.append(saved)
+        # 자동 생성 레시피가 기존 레시피와 거의 같으면 새로 저장하지 않고 기존 레시피에 합침
+        saved = await crud_create_recipe(db, item, on_duplicate="merge")
+        if saved is not None:
+            saved_recipes.append(saved)
     return saved_recipes 
 
 @router.delete(
@@ -115,6 +118,7 @@ async def delete_all_recipes(db=Depends(get_recipe_db)):
     """저장된 모든 레시피를 삭제합니다."""
     try:
         result = await db['recipes'].delete_many({})
+        reset_dedup_index()
         if result.deleted_count == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     ALGORITHM: str = Field(..., alias="ALGORITHM")  # 기본 알고리즘 설정 (선택사항)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(..., alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     AI_DATA_URL: str = Field(..., alias="AI_DATA_URL")
+    RECIPE_DEDUP_THRESHOLD: float = Field(0.8, alias="RECIPE_DEDUP_THRESHOLD")  # 제목+재료 추정 Jaccard 가 이 이상이면 중복 레시피
+    RECIPE_DEDUP_NUM_PERM: int = Field(128, alias="RECIPE_DEDUP_NUM_PERM")  # MinHash 서명 길이
+    RECIPE_DEDUP_BANDS: int = Field(16, alias="RECIPE_DEDUP_BANDS")  # LSH 구간 수 (NUM_PERM 의 약수)
+    RECIPE_DEDUP_CELL_CAPACITY: int = Field(5, alias="RECIPE_DEDUP_CELL_CAPACITY")  # 자동 생성 조건 칸별 최대 레시피 수
+    RECIPE_DEDUP_CELL_MAX_DUPLICATES: int = Field(3, alias="RECIPE_DEDUP_CELL_MAX_DUPLICATES")  # 조건 칸에서 중복이 이만큼 생성되면 더 생성하지 않음
 
     class Config:
         # .env 파일에서 환경변수를 읽어옵니다.
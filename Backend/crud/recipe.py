@@ -1,17 +1,89 @@
 from bson import ObjectId
 from datetime import datetime
 from db.mongo import get_collection
+from utils.recipe_dedup import dedup_write_lock, get_dedup_index
 
 BOOKMARK_COLLECTION = "bookmarks"
 
-async def create_recipe(db, recipe_data: dict) -> dict:
-    """MongoDB 'recipes' 컬렉션에 레시피를 저장하고, id 필드를 문자열로 변환해 반환합니다."""
+async def merge_duplicate(db, recipe_id: str, recipe_data: dict) -> dict | None:
+    """중복 레시피의 태그/적합 체질을 기존 레시피에 합치고, 기존 레시피를 반환합니다. 기존 레시피가 없으면 None"""
+    add_to_set = {
+        field: {'$each': recipe_data[field]}
+        for field in ('tags', 'suitableBodyTypes')
+        if recipe_data.get(field)
+    }
+    if add_to_set:
+        await db['recipes'].update_one({'_id': ObjectId(recipe_id)}, {'$addToSet': add_to_set})
+    return await get_recipe_by_id(db, recipe_id)
+
+async def create_recipe(db, recipe_data: dict, on_duplicate: str = "flag", cell: tuple | None = None) -> dict:
+    """
+    MongoDB 'recipes' 컬렉션에 레시피를 저장하고, id 필드를 문자열로 변환해 반환합니다.
+    제목+재료가 기존 레시피와 거의 같으면 on_duplicate 에 따라
+    - "flag": duplicateOf(기존 레시피 id)를 표시해 저장
+    - "merge": 저장하지 않고 기존 레시피에 태그/적합 체질만 합쳐 기존 레시피를 반환
+    cell 은 자동 생성 조건 칸으로, 포화 판단용 저장/중복 수를 기록합니다.
+    """
     # 클라이언트로부터 들어온 id 필드 제거
     recipe_data.pop('id', None)
-    result = await db['recipes'].insert_one(recipe_data)
-    recipe_data['id'] = str(result.inserted_id)
+    index = await get_dedup_index(db)
+    async with dedup_write_lock:
+        signature = index.signature(recipe_data)
+        duplicate = index.find_duplicate(recipe_data, signature)
+        if duplicate is not None:
+            print(f"중복 레시피 감지: {recipe_data.get('title')} ≈ {duplicate[0]} (유사도 {duplicate[1]:.2f})")
+            if on_duplicate == "merge":
+                merged = await merge_duplicate(db, duplicate[0], recipe_data)
+                if merged is not None:
+                    index.record_duplicate(cell)
+                    return merged
+                # 인덱스에만 남아 있던(이미 삭제된) 레시피: 인덱스에서 빼고 새로 저장
+                index.remove(duplicate[0])
+            else:
+                index.record_duplicate(cell)
+                recipe_data['duplicateOf'] = duplicate[0]
+        result = await db['recipes'].insert_one(recipe_data)
+        recipe_data['id'] = str(result.inserted_id)
+        recipe_data.pop('_id', None)
+        index.add(recipe_data['id'], recipe_data, signature)
+        index.record_saved(cell)
     return recipe_data
 
+async def create_recipes(db, recipes: list[dict], cells: list[tuple] | None = None) -> list[dict]:
+    """
+    여러 레시피를 insert_many 한 번으로 저장하고, 각 레시피에 id 필드를 문자열로 추가해 반환합니다.
+    기존 레시피와 중복이면 기존 레시피에 합치고(merge), 같은 묶음 안의 중복은 버립니다. 반환값은 새로 저장된 레시피만 포함합니다.
+    cells 는 레시피별 자동 생성 조건 칸입니다.
+    """
+    cells = cells or [None] * len(recipes)
+    index = await get_dedup_index(db)
+    async with dedup_write_lock:
+        unique: list[tuple] = []
+        for recipe_data, cell in zip(recipes, cells):
+            recipe_data.pop('id', None)
+            signature = index.signature(recipe_data)
+            if any(index.similarity(signature, other) >= index.threshold for _, other, _ in unique):
+                index.record_duplicate(cell)
+                continue
+            duplicate = index.find_duplicate(recipe_data, signature)
+            if duplicate is not None:
+                if await merge_duplicate(db, duplicate[0], recipe_data) is not None:
+                    index.record_duplicate(cell)
+                    continue
+                index.remove(duplicate[0])
+            unique.append((recipe_data, signature, cell))
+        if not unique:
+            return []
+        result = await db['recipes'].insert_many([recipe_data for recipe_data, _, _ in unique])
+        saved = []
+        for (recipe_data, signature, cell), inserted_id in zip(unique, result.inserted_ids):
+            recipe_data.pop('_id', None)
+            recipe_data['id'] = str(inserted_id)
+            index.add(recipe_data['id'], recipe_data, signature)
+            index.record_saved(cell)
+            saved.append(recipe_data)
+    return saved
+
 async def get_recipe_by_id(db, recipe_id: str) -> dict | None:
     """주어진 ID의 레시피를 조회하여 id 필드를 문자열로 변환해 반환합니다."""
     doc = await db['recipes'].find_one({'_id': ObjectId(recipe_id)})
@@ -20,6 +92,13 @@ async def get_recipe_by_id(db, recipe_id: str) -> dict | None:
     doc['id'] = str(doc['_id'])
     return doc
 
+async def get_recipes_by_response_cache_id(db, cache_id: str) -> list[dict]:
+    """같은 AI 캐시 응답으로 이미 저장된 레시피 목록을 조회합니다."""
+    docs = await db['recipes'].find({'responseCacheId': cache_id}).to_list(length=100)
+    for doc in docs:
+        doc['id'] = str(doc.pop('_id'))
+    return docs
+
 async def add_bookmark(user_id: str, recipe_id: str):
     collection = get_collection(BOOKMARK_COLLECTION)
     bookmark = {
@@ -54,4 +133,8 @@ async def update_recipe(db, recipe_id: str, update_data: dict) -> dict:
         await db['recipes'].update_one({'_id': ObjectId(recipe_id)}, {'$set': update_set})
     doc = await db['recipes'].find_one({'_id': ObjectId(recipe_id)})
     doc['id'] = str(doc['_id'])
+    # 제목/재료가 바뀌었을 수 있으므로 중복 인덱스의 서명을 다시 계산
+    index = await get_dedup_index(db)
+    async with dedup_write_lock:
+        index.update(doc['id'], doc)
     return doc 
\ No newline at end of file
@@ -21,6 +21,8 @@ class Recipe(BaseModel):
     category: str = Field(..., description="카테고리 (한식, 중식 등)")
     keyIngredients: list[str] = Field(..., description="중요 재료 목록 (육류, 해산물 등)")
     lastEditReason: Optional[str] = Field(None, description="최신 수정 사유")
+    duplicateOf: Optional[str] = Field(None, description="제목/재료가 거의 같은 기존 레시피 ID (근사 중복으로 표시된 경우)")
+    responseCacheId: Optional[str] = Field(None, description="이 레시피를 만든 AI 응답의 캐시 ID (캐시 적중 시 재저장 방지용)")
 
 class BookmarkCreate(BaseModel):
     recipe_id: str = Field(..., description="레시피 ID")
@@ -1,7 +1,11 @@
-import os
-import requests
+import asyncio
+import json
 import random
+import httpx
 from core.config import settings
+from crud.recipe import create_recipes
+from db.session import recipe_db
+from utils.recipe_dedup import generation_cell, get_dedup_index
 
 CONSTITUTIONS = [
     "목양체질","목음체질","토양체질","토음체질",
@@ -11,7 +15,11 @@ CATEGORIES = ["한식","중식","일식","양식","디저트","음료"]
 DIFFICULTIES = ["쉬움","중간","어려움"]
 INGREDIENTS = ["육류","해산물","채소","과일","유제품","견과류"]
 
-API_URL = f"{settings.AI_DATA_URL}/api/v1/recipes/auto_generate"
+# Ai-Data 일괄 생성 엔드포인트: 조건 목록을 보내면 완료되는 순서대로 NDJSON 한 줄씩 응답
+API_URL = f"{settings.AI_DATA_URL}/api/v1/constitution_recipe/auto_generate/batch"
+INSERT_CHUNK_SIZE = 10  # 이 개수만큼 모이면 insert_many 로 저장
+CONCURRENCY = 4         # Ai-Data 에 요청할 동시 생성 수 (서버 설정값이 상한)
+
 def generate_recipe_payload():
     return {
         "constitution": random.choice(CONSTITUTIONS),
@@ -23,19 +31,53 @@ def generate_recipe_payload():
         )
     }
 
-def generate_recipes_batch(count=30):
-    recipes = []
-    for i in range(count):
+def unsaturated_payloads(index, count, max_draws_per_spec=10):
+    """이미 레시피가 충분하거나 중복만 나오는(포화된) 조건 칸을 건너뛰고 count 개 조건을 뽑습니다."""
+    payloads = []
+    for _ in range(count * max_draws_per_spec):
+        if len(payloads) >= count:
+            break
         payload = generate_recipe_payload()
-        try:
-            response = requests.post(API_URL, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            recipes.extend(result)
-        except Exception as e:
-            print(f"[자동생성] {i+1}/{count} 실패: {e}")
-    print(f"[자동생성] {len(recipes)}개 레시피 생성 완료")
-    return recipes
+        cell = generation_cell(payload["constitution"], payload["category"], payload["difficulty"], payload["keyIngredients"])
+        if not index.is_saturated(cell):
+            payloads.append(payload)
+    return payloads
+
+async def generate_recipes_batch(count=30, db=recipe_db):
+    """count 개 조건을 한 번에 요청하고, 스트림으로 도착하는 레시피를 묶어서 저장합니다. (중복은 기존 레시피에 합침)"""
+    specs = unsaturated_payloads(await get_dedup_index(db), count)
+    if len(specs) < count:
+        print(f"[자동생성] 포화된 조건 칸을 건너뜀: {count - len(specs)}개")
+    if not specs:
+        return []
+    payload = {"specs": specs, "concurrency": CONCURRENCY}
+    saved: list[dict] = []
+    chunk: list[dict] = []
+    chunk_cells: list[tuple] = []  # 레시피별 요청 조건 칸 (포화 판단은 LLM 응답 필드가 아닌 요청 조건 기준)
+    failed = 0
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(10.0, read=None)) as client:
+            async with client.stream("POST", API_URL, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    if "recipe" not in item:
+                        failed += 1
+                        print(f"[자동생성] {item.get('index', -1) + 1}/{len(specs)} 실패: {item.get('error')}")
+                        continue
+                    spec = specs[item["index"]]
+                    chunk.append(item["recipe"])
+                    chunk_cells.append(generation_cell(spec["constitution"], spec["category"], spec["difficulty"], spec["keyIngredients"]))
+                    if len(chunk) >= INSERT_CHUNK_SIZE:
+                        saved.extend(await create_recipes(db, chunk, chunk_cells))
+                        chunk, chunk_cells = [], []
+    finally:
+        # 스트림이 중간에 끊겨도 이미 받은 레시피는 저장
+        saved.extend(await create_recipes(db, chunk, chunk_cells))
+    print(f"[자동생성] {len(saved)}개 레시피 생성/저장 완료, 실패 {failed}개")
+    return saved
 
 if __name__ == "__main__":
-    generate_recipes_batch(30)
+    asyncio.run(generate_recipes_batch(30))
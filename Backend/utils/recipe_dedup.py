@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.config import settings
+
+# MinHash 해시 함수: h(x) = (a * x + b) mod p, p 는 메르센 소수 2^61 - 1
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub("", (text or "").lower())
+
+
+def ingredient_name(ingredient: str) -> str:
+    """'다진 돼지고기 1종이컵' → '다진돼지고기' : 첫 숫자 앞까지, 괄호와 공백 제거"""
+    name = re.split(r"\d", ingredient or "", maxsplit=1)[0] or ingredient or ""
+    return _normalize(re.sub(r"\(.*?\)", "", name))
+
+
+def recipe_shingles(recipe: dict) -> set:
+    """제목 글자 3-gram 과 정규화된 재료명으로 shingle 집합을 만듭니다."""
+    title = _normalize(recipe.get("title", ""))
+    shingles = {f"t:{title[i:i + 3]}" for i in range(max(len(title) - 2, 1))} if title else set()
+    shingles.update(f"i:{name}" for name in map(ingredient_name, recipe.get("ingredients") or []) if name)
+    return shingles
+
+
+def recipe_cells(recipe: dict) -> List[tuple]:
+    """자동 생성 조건 단위 칸: (체질, 카테고리, 난이도, 중요 재료) — 적합 체질마다 한 칸씩"""
+    key_ingredients = tuple(sorted(recipe.get("keyIngredients") or []))
+    return [
+        generation_cell(constitution, recipe.get("category"), recipe.get("difficulty"), key_ingredients)
+        for constitution in recipe.get("suitableBodyTypes") or []
+    ]
+
+
+def generation_cell(constitution: str, category: Optional[str], difficulty: Optional[str], key_ingredients: Iterable[str]) -> tuple:
+    return (constitution, category, difficulty, tuple(sorted(key_ingredients or [])))
+
+
+class RecipeDedupIndex:
+    """
+    레시피 근사 중복 탐지용 MinHash/LSH 인덱스.
+    서명(num_perm 개 최소 해시)을 bands 개 구간으로 나눠 구간이 하나라도 같으면 후보로 보고,
+    후보의 서명 일치율(추정 Jaccard)이 threshold 이상이면 중복으로 판정합니다.
+    조건 칸(generation_cell)별 저장 수와 중복 생성 수를 세어 자동 생성기의 포화 판단에 사용합니다.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.8, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 로 나누어떨어져야 합니다.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._buckets: List[Dict[tuple, List[str]]] = [defaultdict(list) for _ in range(bands)]
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self.cell_saved: Dict[tuple, int] = defaultdict(int)
+        self.cell_duplicates: Dict[tuple, int] = defaultdict(int)
+
+    def signature(self, recipe: dict) -> Tuple[int, ...]:
+        hashes = [_token_hash(shingle) for shingle in recipe_shingles(recipe)]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in self._params)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def similarity(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def add(self, recipe_id: str, recipe: dict, signature: Optional[Tuple[int, ...]] = None):
+        if recipe_id in self._signatures:
+            return
+        signature = signature or self.signature(recipe)
+        self._signatures[recipe_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[band][key].append(recipe_id)
+
+    def remove(self, recipe_id: str):
+        """삭제되었거나 수정될 레시피를 인덱스에서 뺍니다. (칸별 저장 수는 그대로 둠)"""
+        signature = self._signatures.pop(recipe_id, None)
+        if signature is None:
+            return
+        for band, key in self._band_keys(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket and recipe_id in bucket:
+                bucket.remove(recipe_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def update(self, recipe_id: str, recipe: dict):
+        """수정된 레시피의 제목/재료로 서명을 다시 계산합니다."""
+        self.remove(recipe_id)
+        self.add(recipe_id, recipe)
+
+    def query(self, recipe: dict, signature: Optional[Tuple[int, ...]] = None) -> List[Tuple[str, float]]:
+        """threshold 이상인 기존 레시피 (id, 추정 유사도) 목록, 유사도 내림차순"""
+        signature = signature or self.signature(recipe)
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        matches = [(rid, self.similarity(signature, self._signatures[rid])) for rid in candidates]
+        return sorted([m for m in matches if m[1] >= self.threshold], key=lambda m: m[1], reverse=True)
+
+    def find_duplicate(self, recipe: dict, signature: Optional[Tuple[int, ...]] = None) -> Optional[Tuple[str, float]]:
+        matches = self.query(recipe, signature)
+        return matches[0] if matches else None
+
+    def record_saved(self, cell: Optional[tuple]):
+        if cell is not None:
+            self.cell_saved[cell] += 1
+
+    def record_duplicate(self, cell: Optional[tuple]):
+        if cell is not None:
+            self.cell_duplicates[cell] += 1
+
+    def is_saturated(self, cell: tuple) -> bool:
+        """칸에 저장된 레시피가 충분하거나, 이 칸에서 중복만 반복해서 생성되면 포화"""
+        return (self.cell_saved.get(cell, 0) >= settings.RECIPE_DEDUP_CELL_CAPACITY
+                or self.cell_duplicates.get(cell, 0) >= settings.RECIPE_DEDUP_CELL_MAX_DUPLICATES)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+recipe_dedup_index = RecipeDedupIndex(
+    num_perm=settings.RECIPE_DEDUP_NUM_PERM,
+    bands=settings.RECIPE_DEDUP_BANDS,
+    threshold=settings.RECIPE_DEDUP_THRESHOLD,
+)
+_build_lock = asyncio.Lock()
+_built = False
+# 중복 조회 → 저장 → 인덱스 추가 사이에 다른 요청이 끼어들어 같은 레시피가 두 번 저장되지 않도록 하는 잠금
+dedup_write_lock = asyncio.Lock()
+
+_INDEX_FIELDS = {"title": 1, "ingredients": 1, "category": 1, "difficulty": 1, "keyIngredients": 1, "suitableBodyTypes": 1}
+
+
+async def get_dedup_index(db) -> RecipeDedupIndex:
+    """
+    처음 호출될 때 'recipes' 컬렉션 전체로 인덱스를 만들고, 이후에는 저장/수정 시점마다 갱신합니다.
+    기존 레시피의 칸별 저장 수는 생성 조건이 남아 있지 않으므로 레시피 필드(recipe_cells)로 근사합니다.
+    """
+    global _built
+    if _built:
+        return recipe_dedup_index
+    async with _build_lock:
+        if not _built:
+            count = 0
+            async for doc in db['recipes'].find({}, _INDEX_FIELDS):
+                recipe_dedup_index.add(str(doc['_id']), doc)
+                for cell in recipe_cells(doc):
+                    recipe_dedup_index.record_saved(cell)
+                count += 1
+            _built = True
+            print(f"레시피 중복 인덱스 생성: {count}개")
+    return recipe_dedup_index
+
+
+def reset_dedup_index():
+    """'recipes' 컬렉션이 통째로 바뀐 경우(전체 삭제 등) 다음 호출 때 다시 만들도록 인덱스를 비웁니다."""
+    global recipe_dedup_index, _built
+    recipe_dedup_index = RecipeDedupIndex(
+        num_perm=settings.RECIPE_DEDUP_NUM_PERM,
+        bands=settings.RECIPE_DEDUP_BANDS,
+        threshold=settings.RECIPE_DEDUP_THRESHOLD,
+    )
+    _built = False